@@ -21,7 +21,8 @@ import sys
 
 import pandas as pd
 
-from env import path
+import schemas
+import sources
 
 
 
@@ -30,13 +31,16 @@ from env import path
 # ===========
 
 
-def read_data(filename):
+def read_data(filename, use_cache=True):
 	"""
 	Reads in the dataset: Air Quality
     from the City of San Antonio (COSA)
 
+    Column types come from schemas.py and the parsed file
+    is cached (see cache.py) until it changes.
 	"""
-	return pd.read_csv(path + filename, low_memory=False)
+	return sources.read_csv(filename, use_cache=use_cache, low_memory=False,
+	                        **schemas.read_options(sources.base_name(filename)))
 
 
 
@@ -49,9 +53,10 @@ def read_data(filename):
 def clear():
 	os.system("cls" if os.name == "nt" else "clear")
 
-def main():
+def main(argv=None):
     """Main entry point for the script."""
-    pass
+    import pipeline
+    return pipeline.main(argv, dataset='aqi')
 
 
 if __name__ == '__main__':
@@ -17,11 +17,14 @@ This script contains code used by the following jupytr notebooks:
 
 
 import os
+import re
 import sys
+import warnings
 
 import pandas as pd
 
-from env import path
+import schemas
+import sources
 
 
 
@@ -30,15 +33,83 @@ from env import path
 # ===========
 
 
-def read_data(filename):
+def read_data(filename, use_cache=True):
 	"""
 	Reads in the datasets from the San Antonio River Authority:
     - Flood Stage Levels
     - Rainfall Details
     - Rainfall Summary
     - Water Quality
+
+    Column types come from schemas.py and the parsed file
+    is cached (see cache.py) until it changes.
+	"""
+	return sources.read_csv(filename, use_cache=use_cache, low_memory=False,
+	                        **schemas.read_options(sources.base_name(filename)), on_bad_lines='skip')
+
+
+def stream_data(filename, chunksize=100000, locations=None, start=None, end=None, skipped=None):
+	"""
+	Reads in a San Antonio River Authority dataset in chunks of
+    chunksize rows so that multi-year exports fit in memory.
+
+    Only rows of the gauges in locations and with a date between
+    start and end (inclusive) are kept; a date-only end such as
+    '2018-03-31' keeps that whole day. Malformed lines are
+    skipped and their line numbers appended to the skipped list.
+    The files of a glob pattern are streamed one after another.
+	"""
+	options = schemas.read_options(sources.base_name(filename))
+	date_col = (options.get('parse_dates') or [None])[0]
+	if (start is not None or end is not None) and date_col is None:
+		raise ValueError('{} has no date column to filter on'.format(filename))
+	if locations is not None:
+		locations = [locations] if isinstance(locations, str) else list(locations)
+	start = None if start is None else pd.Timestamp(start)
+	end = None if end is None else pd.Timestamp(end)
+	whole_day = end is not None and end == end.normalize()
+	if whole_day:
+		end += pd.Timedelta(days=1)
+
+	for filepath in sources.source_paths(filename):
+		reader = pd.read_csv(filepath, chunksize=chunksize, on_bad_lines='warn',
+		                     **sources.reader_options(filepath, memory_map=False), **options)
+		with reader:
+			while True:
+				with warnings.catch_warnings(record=True) as caught:
+					warnings.simplefilter('always')
+					try:
+						chunk = next(reader)
+					except StopIteration:
+						break
+				count_bad_lines(caught, skipped)
+
+				keep = pd.Series(True, index=chunk.index)
+				if locations is not None:
+					keep &= chunk['location_name'].isin(locations)
+				if start is not None:
+					keep &= chunk[date_col] >= start
+				if end is not None:
+					keep &= chunk[date_col] < end if whole_day else chunk[date_col] <= end
+				if not keep.all():
+					chunk = chunk[keep]
+				if len(chunk):
+					yield chunk
+
+
+def count_bad_lines(caught, skipped):
+	"""
+	Collects the line numbers from the parser's
+    'Skipping line N' warnings and re-raises the other warnings.
 	"""
-	return pd.read_csv(path + filename, low_memory=False, error_bad_lines=False)
+	for warning in caught:
+		if issubclass(warning.category, pd.errors.ParserWarning):
+			lines = re.findall(r'Skipping line (\d+)', str(warning.message))
+			if lines:
+				if skipped is not None:
+					skipped.extend(int(line) for line in lines)
+				continue
+		warnings.warn_explicit(warning.message, warning.category, warning.filename, warning.lineno)
     
 
 # ==================================================
@@ -49,9 +120,10 @@ def read_data(filename):
 def clear():
 	os.system("cls" if os.name == "nt" else "clear")
 
-def main():
+def main(argv=None):
     """Main entry point for the script."""
-    pass
+    import pipeline
+    return pipeline.main(argv, dataset='sara')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following scripts:
+
+1. geocode.py
+2.
+3.
+
+It puts the spill street addresses into one canonical form so
+that "6804 S FLORES" and "6804 S Flores St" are the same place.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import re
+import sys
+
+import pandas as pd
+
+
+
+# =============
+# NORMALIZATION
+# =============
+
+
+DIRECTIONALS = {'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+                'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+                }
+
+SUFFIXES = {'STREET': 'ST', 'STR': 'ST',
+            'AVENUE': 'AVE', 'AV': 'AVE',
+            'ROAD': 'RD',
+            'DRIVE': 'DR',
+            'LANE': 'LN',
+            'BOULEVARD': 'BLVD',
+            'COURT': 'CT',
+            'CIRCLE': 'CIR',
+            'PLACE': 'PL',
+            'PARKWAY': 'PKWY',
+            'HIGHWAY': 'HWY',
+            'TRAIL': 'TRL',
+            'TERRACE': 'TER',
+            'COVE': 'CV',
+            'SQUARE': 'SQ',
+            'CROSSING': 'XING',
+            'EXPRESSWAY': 'EXPY',
+            'FREEWAY': 'FWY',
+            'LOOP': 'LOOP',
+            'PATH': 'PATH',
+            'PASS': 'PASS',
+            'RUN': 'RUN',
+            'WAY': 'WAY',
+            }
+
+SUFFIX_WORDS = '|'.join(sorted(set(SUFFIXES) | set(SUFFIXES.values()), key=len, reverse=True))
+
+LAST_SUFFIX_PATTERN = re.compile(r'^(?!\d+\w* \S+$)(.+ )(' + '|'.join(sorted(SUFFIXES, key=len, reverse=True)) + r')$')
+
+DIRECTIONAL_PATTERN = re.compile(r'^(\d+\w* )(' + '|'.join(sorted(DIRECTIONALS, key=len, reverse=True))
+                                 + r') (?=\S+ \S|(?!(?:' + SUFFIX_WORDS + r')$)\S+$)')
+
+SUFFIX_PATTERN = re.compile(r'^(\d+\w* .+?) (' + '|'.join(sorted(set(SUFFIXES.values()))) + r')$')
+
+
+def canonical_forms(addresses):
+    """
+    This function returns the canonical form of a series of
+    address strings: uppercase, without city/state after a
+    comma, without punctuation and with single spaces. Only a
+    street suffix in the last position and a directional right
+    after the house number are abbreviated, so the words of a
+    street name stay ("200 COURT ST", "100 WEST AVE").
+    """
+    forms = addresses.astype(object).str.upper().str.split(',', n=1).str[0]
+    forms = forms.str.replace(r'[^\w\s#-]', ' ', regex=True)
+    forms = forms.str.replace(r'\s+', ' ', regex=True).str.strip()
+    forms = forms.str.replace(LAST_SUFFIX_PATTERN, lambda match: match.group(1) + SUFFIXES[match.group(2)],
+                              regex=True)
+    forms = forms.str.replace(DIRECTIONAL_PATTERN,
+                              lambda match: match.group(1) + DIRECTIONALS[match.group(2)] + ' ', regex=True)
+    return forms
+
+
+def normalize_address(address):
+    """
+    This function returns the canonical form of one address
+    (see canonical_forms).
+    """
+    if not isinstance(address, str):
+        return address
+    return canonical_forms(pd.Series([address], dtype=object)).iloc[0]
+
+
+def normalize_addresses(addresses):
+    """
+    This function normalizes a series of addresses. Each
+    distinct address is normalized once and mapped back.
+    """
+    addresses = pd.Series(addresses)
+    codes, uniques = pd.factorize(addresses)
+    normalized = pd.Series(uniques, dtype=object)
+    strings = normalized.map(type) == str
+    normalized[strings] = canonical_forms(normalized[strings])
+    values = normalized.reindex(codes).to_numpy()
+    return pd.Series(values, index=addresses.index, name=addresses.name)
+
+
+def address_keys(addresses, known=()):
+    """
+    This function returns the lookup key of every address:
+    its canonical form. An address without a street suffix
+    ("6804 S FLORES") takes the key of its suffixed variant
+    ("6804 S FLORES ST") when there is exactly one among the
+    addresses and the known keys (e.g. those of a cache); with
+    none or several ("12251 FAIRVIEW AVE", "12251 FAIRVIEW LN")
+    it keeps its own.
+    """
+    keys = normalize_addresses(addresses)
+    forms = pd.Series(keys[keys.map(type) == str].unique(), dtype=object)
+    variants = pd.Series(pd.unique(pd.concat([forms, pd.Series(list(known), dtype=object)])), dtype=object)
+    bases = variants.str.extract(SUFFIX_PATTERN)[0]
+    suffixed = pd.DataFrame({'base': bases, 'form': variants}).dropna()
+    unique = suffixed.drop_duplicates('base', keep=False).set_index('base')['form']
+    unsuffixed = forms[~forms.isin(suffixed['form']) & forms.isin(unique.index)]
+    folds = pd.Series(unique[unsuffixed].to_numpy(), index=unsuffixed.to_numpy(), dtype=object)
+    return keys.where(~keys.isin(folds.index), keys.map(folds))
+
+
+def address_ids(addresses):
+    """
+    This function returns the address keys as a categorical
+    series. The categories are the sorted canonical addresses
+    and the codes (.cat.codes) are their integer ids, -1 for
+    missing addresses, so near duplicates like "S FLORES ST"
+    and "S Flores" share one id and address groupbys run on
+    compact integer keys.
+    """
+    keys = address_keys(addresses)
+    keys = keys.where(keys.map(type) == str)
+    categories = pd.Index(keys.dropna().unique(), dtype=object).sort_values()
+    return keys.astype(pd.CategoricalDtype(categories))
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
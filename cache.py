@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the acquire and prepare scripts:
+
+1. acquire_sso.py
+2. acquire_sara.py
+3. acquire_aqi.py
+4. prepare_sso.py
+
+It keeps a columnar copy of every parsed csv file so that
+the next call to read_data() does not have to parse it again,
+and the results of the prepare stages (see memoize_stage).
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+import glob
+import hashlib
+import functools
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+
+
+# =====
+# CACHE
+# =====
+
+
+def cache_dir(filepath):
+    """
+    This function returns the directory where the cached copies
+    of filepath are kept. It can be moved with the
+    SAWS_CACHE_DIR environment variable.
+    """
+    default = os.path.join(os.path.dirname(os.path.abspath(filepath)), '.cache')
+    return os.environ.get('SAWS_CACHE_DIR', default)
+
+
+def file_version(*paths):
+    """
+    This function returns a hash of the path, size and
+    modification time of the files.
+    """
+    parts = []
+    for path in paths:
+        stat = os.stat(path)
+        parts += [os.path.abspath(path), str(stat.st_size), str(stat.st_mtime_ns)]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:8]
+
+
+def cache_key(filepath, **kwargs):
+    """
+    This function returns a key <version>-<options> made of
+    the file_version of the source file and a hash of the
+    reader options.
+    """
+    options = '|'.join('{}={!r}'.format(k, kwargs[k]) for k in sorted(kwargs))
+    return '{}-{}'.format(file_version(filepath), hashlib.sha1(options.encode('utf-8')).hexdigest()[:8])
+
+
+def cache_path(filepath, key):
+    """
+    This function returns the file name of a cached copy:
+    <source file>.<path hash>.<key>.<format>
+    """
+    source = os.path.abspath(filepath)
+    path_hash = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+    name = '{}.{}.{}.{}'.format(os.path.basename(source), path_hash, key, CACHE_FORMAT)
+    return os.path.join(cache_dir(filepath), name)
+
+
+def read_cache(cached):
+    """
+    This function loads a cached dataframe. Parquet reads
+    string categories back as str; the categoricals saved
+    with object categories get them back (see save_frame).
+    """
+    if not cached.endswith('.parquet'):
+        return pd.read_pickle(cached)
+    df = pd.read_parquet(cached)
+    for column in df.attrs.pop('object_categories', []):
+        df[column] = df[column].cat.set_categories(df[column].cat.categories.astype(object))
+    return df
+
+
+def save_frame(df, target, fallback=True):
+    """
+    This function writes a dataframe atomically and returns
+    the file name. Frames that parquet cannot hold (mixed-type
+    object columns) are pickled instead, or raise without
+    fallback. The names of the categoricals with object
+    categories are kept in the parquet metadata.
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + '.tmp'
+    try:
+        if target.endswith('.parquet'):
+            try:
+                stored = df.copy(deep=False)
+                stored.attrs['object_categories'] = [
+                    column for column, dtype in df.dtypes.items()
+                    if isinstance(dtype, pd.CategoricalDtype) and dtype.categories.dtype == object]
+                stored.to_parquet(tmp)
+            except Exception:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                if not fallback:
+                    raise
+                target = target[:-len('parquet')] + 'pickle'
+                tmp = target + '.tmp'
+                df.to_pickle(tmp)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return target
+
+
+def write_cache(df, cached):
+    """
+    This function saves a dataframe and removes the stale
+    copies of its source: those of another version (size or
+    mtime) of the file. Copies of the same version read with
+    other options are kept.
+    """
+    directory = os.path.dirname(cached)
+    stem, key, _ = os.path.basename(cached).rsplit('.', 2)
+    version = key.split('-')[0]
+    for copy in glob.glob(os.path.join(directory, glob.escape(stem) + '.*')):
+        if os.path.basename(copy)[len(stem) + 1:].split('-')[0] != version:
+            os.remove(copy)
+    return save_frame(df, cached)
+
+
+def csv_cache_path(filepath, **kwargs):
+    """
+    This function returns the file name of the cached copy of
+    filepath read with the pd.read_csv options kwargs.
+    """
+    return cache_path(filepath, cache_key(filepath, **kwargs))
+
+
+def read_csv_cached(filepath, cache=True, **kwargs):
+    """
+    This function reads a csv file with pd.read_csv and keeps
+    a columnar copy keyed on the file's path, size and mtime.
+    Later calls return the cached copy until the file changes;
+    the name of the copy is kept in df.attrs['cache_path'].
+    """
+    if not cache:
+        return pd.read_csv(filepath, **kwargs)
+    cached = csv_cache_path(filepath, **kwargs)
+    for candidate in (cached, cached[:-len(CACHE_FORMAT)] + 'pickle'):
+        if os.path.exists(candidate):
+            df = read_cache(candidate)
+            df.attrs['cache_path'] = candidate
+            return df
+    df = pd.read_csv(filepath, **kwargs)
+    df.attrs['cache_path'] = write_cache(df, cached)
+    return df
+
+
+def cached_copies(filepath):
+    """
+    This function returns the file names of the cached
+    copies of filepath.
+    """
+    source = os.path.abspath(filepath)
+    path_hash = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+    pattern = '{}.{}.*'.format(glob.escape(os.path.basename(source)), path_hash)
+    return glob.glob(os.path.join(cache_dir(filepath), pattern))
+
+
+def clear_cache(filepath):
+    """
+    This function removes every cached copy of filepath.
+    """
+    for cached in cached_copies(filepath):
+        os.remove(cached)
+
+
+
+# ===========
+# STAGE CACHE
+# ===========
+
+
+STAGE_CACHE_BYTES = int(os.environ.get('SAWS_STAGE_CACHE_BYTES', 512 * 1024 ** 2))
+
+
+def stage_cache_dir():
+    """
+    This function returns the directory of the prepare stage
+    cache. It can be moved with the SAWS_STAGE_CACHE_DIR
+    environment variable.
+    """
+    default = os.path.join('data', '.cache', 'stages')
+    return os.environ.get('SAWS_STAGE_CACHE_DIR', default)
+
+
+def frame_fingerprint(df):
+    """
+    This function hashes the values, index, columns and
+    dtypes of a dataframe or series.
+    """
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    if isinstance(df, pd.DataFrame):
+        digest.update(repr(list(df.columns)).encode('utf-8'))
+        digest.update(repr([str(dtype) for dtype in df.dtypes]).encode('utf-8'))
+    else:
+        digest.update(repr((df.name, str(df.dtype))).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def code_fingerprint(func, modules=()):
+    """
+    This function hashes the source files of the module that
+    defines func and of the modules it depends on. Functions
+    without a source file (notebook cells) hash their bytecode.
+    """
+    digest = hashlib.sha1()
+    for module in (sys.modules.get(func.__module__),) + tuple(modules):
+        source = getattr(module, '__file__', None)
+        if source and os.path.exists(source):
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+        else:
+            digest.update(func.__code__.co_code)
+            digest.update(repr(func.__code__.co_consts).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stage_key(code, args, kwargs):
+    """
+    This function combines the code fingerprint with the
+    fingerprints of the dataframe arguments and the repr
+    of the other parameters.
+    """
+    parts = [code]
+    for arg in list(args) + [kwargs[k] for k in sorted(kwargs)]:
+        if isinstance(arg, (pd.DataFrame, pd.Series)):
+            parts.append(frame_fingerprint(arg))
+        else:
+            parts.append(repr(arg))
+    parts += sorted(kwargs)
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:24]
+
+
+def evict_stages(limit=None):
+    """
+    This function removes the least recently used stage
+    results until the cache fits in limit bytes.
+    """
+    limit = STAGE_CACHE_BYTES if limit is None else limit
+    entries = []
+    for entry in glob.glob(os.path.join(stage_cache_dir(), '*.*')):
+        if entry.endswith('.tmp'):
+            continue
+        stat = os.stat(entry)
+        entries.append((stat.st_mtime, stat.st_size, entry))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= limit:
+            break
+        os.remove(entry)
+        total -= size
+
+
+def memoize_stage(*modules):
+    """
+    This decorator caches the dataframe returned by a prepare
+    stage on disk, keyed on its input data, its parameters and
+    the source of its module (plus the modules passed in).
+    A hit refreshes the entry's mtime, which drives the
+    least-recently-used eviction. Call func.uncached to skip it.
+    """
+    def decorator(func):
+        code = code_fingerprint(func, modules)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = os.path.join(stage_cache_dir(),
+                                  '{}.{}'.format(func.__name__, stage_key(code, args, kwargs)))
+            for candidate in (target + '.parquet', target + '.pickle'):
+                if os.path.exists(candidate):
+                    os.utime(candidate)
+                    return read_cache(candidate)
+            result = func(*args, **kwargs)
+            save_frame(result, target + '.' + CACHE_FORMAT)
+            evict_stages()
+            return result
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
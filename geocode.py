@@ -0,0 +1,516 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. archived/dd-sso.ipynb
+2.
+3.
+
+It geocodes spill street addresses into (zip, lat, long). Results
+are kept in a csv cache, seeded from the files the notebooks
+already geocoded, and only the misses are sent to the service
+in concurrent, rate-limited batches.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import warnings
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlparse, parse_qs
+from urllib.request import urlopen
+
+import pandas as pd
+
+from addresses import address_keys
+
+
+
+# =====
+# CACHE
+# =====
+
+
+CACHE_FILE = os.path.join('data', 'geocode-cache.csv')
+
+SEED_FILES = [('sso-location-info.csv', 'addresses'),
+              ('sso-loc-info-10.csv', 'addresses'),
+              ('sso-geocoded.csv', 'spill_street_address'),
+              ('dd-geocoded.csv', 'spill_street_address'),
+              ]
+
+COLUMNS = ['zip', 'lat', 'long']
+
+
+def seed_frame(directory='data'):
+    """
+    This function collects the (address, zip, lat, long) rows
+    that were geocoded by the notebooks into one frame
+    indexed by address key.
+    """
+    frames = []
+    for filename, address_col in SEED_FILES:
+        filepath = os.path.join(directory, filename)
+        if os.path.exists(filepath):
+            frame = pd.read_csv(filepath, usecols=[address_col] + COLUMNS, dtype={'zip': str})
+            frames.append(frame.rename(columns={address_col: 'address'}))
+    filepath = os.path.join(directory, 'geocoded_saws.csv')
+    if os.path.exists(filepath):
+        frame = pd.read_csv(filepath, usecols=['spill_street_address', 'Postal', 'PostalExt', 'X', 'Y'],
+                            dtype={'Postal': str})
+        postal_ext = frame['PostalExt'].astype('Int64').astype(str).str.zfill(4)
+        frames.append(pd.DataFrame({'address': frame['spill_street_address'],
+                                    'zip': frame['Postal'].where(frame['PostalExt'].isna(),
+                                                                 frame['Postal'] + '-' + postal_ext),
+                                    'lat': frame['Y'],
+                                    'long': frame['X'],
+                                    }))
+    if not frames:
+        return empty_cache()
+    seeds = pd.concat(frames, ignore_index=True).dropna(subset=['address', 'lat', 'long'])
+    seeds.index = address_keys(seeds['address']).rename('key')
+    return seeds.loc[~seeds.index.duplicated(), COLUMNS]
+
+
+def empty_cache():
+    return pd.DataFrame({'zip': pd.Series(dtype=object),
+                         'lat': pd.Series(dtype='float64'),
+                         'long': pd.Series(dtype='float64'),
+                         }, index=pd.Index([], dtype=object, name='key'))
+
+
+class GeocodeCache:
+    """
+    This class maps address keys to (zip, lat, long) and
+    persists them to a csv file. A new cache file is seeded
+    from the geocoded csv files in data/.
+    """
+
+    def __init__(self, filepath=CACHE_FILE, seed_directory='data'):
+        self.filepath = filepath
+        self.lock = threading.Lock()
+        if filepath is not None and os.path.exists(filepath):
+            self.frame = pd.read_csv(filepath, index_col='key', dtype={'zip': str, 'key': str})
+        elif seed_directory is not None:
+            self.frame = seed_frame(seed_directory)
+        else:
+            self.frame = empty_cache()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def missing(self, keys):
+        """
+        This method returns the distinct keys that are not cached.
+        """
+        keys = pd.Index(pd.unique(pd.Series(keys).dropna()))
+        return keys[~keys.isin(self.frame.index)]
+
+    def lookup(self, keys):
+        """
+        This method returns the cached rows for keys, in
+        order, with NaN for the misses.
+        """
+        return self.frame.reindex(pd.Index(keys, name='key'))
+
+    def update(self, results):
+        """
+        This method adds a frame of results indexed by key.
+        """
+        results = results[COLUMNS]
+        with self.lock:
+            keep = ~self.frame.index.isin(results.index)
+            self.frame = pd.concat([self.frame[keep], results])
+
+    def save(self):
+        if self.filepath is None:
+            return
+        with self.lock:
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.frame.to_csv(self.filepath + '.tmp', index_label='key')
+            os.replace(self.filepath + '.tmp', self.filepath)
+
+
+
+# ========
+# BACKENDS
+# ========
+
+
+class RateLimiter:
+    """
+    This class spaces calls to wait() at least 1 / rate
+    seconds apart across threads.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_call = 0.0
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        return delay
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def parse_results(payload):
+    """
+    This function turns a MapQuest geocoding response into a
+    list of (zip, lat, long), one per requested location.
+    """
+    rows = []
+    for result in payload.get('results', []):
+        locations = result.get('locations') or [{}]
+        location = locations[0]
+        lat_lng = location.get('latLng') or {}
+        rows.append((location.get('postalCode') or None, lat_lng.get('lat'), lat_lng.get('lng')))
+    return rows
+
+
+class MapQuestBackend:
+    """
+    This class geocodes batches of up to 100 addresses with
+    the MapQuest batch geocoding API. The key is read from the
+    MAPQUEST_KEY environment variable.
+    """
+
+    batch_size = 100
+
+    def __init__(self, key=None, url='https://www.mapquestapi.com/geocoding/v1/batch',
+                 city='San Antonio TX', timeout=30):
+        self.key = key if key is not None else os.environ.get('MAPQUEST_KEY', '')
+        self.url = url
+        self.city = city
+        self.timeout = timeout
+
+    def request_url(self, addresses):
+        params = [('key', self.key), ('inFormat', 'kvp'), ('outFormat', 'json'),
+                  ('thumbMaps', 'false'), ('maxResults', '1')]
+        params += [('location', '{} {}'.format(address, self.city).strip()) for address in addresses]
+        return self.url + '?' + urlencode(params)
+
+    def geocode_batch(self, addresses):
+        with urlopen(self.request_url(addresses), timeout=self.timeout) as response:
+            rows = parse_results(json.loads(response.read().decode('utf-8')))
+        return check_rows(addresses, rows)
+
+
+class AsyncMapQuestBackend(MapQuestBackend):
+    """
+    This class is the MapQuestBackend for geocode_async(),
+    sending its requests over a shared aiohttp session.
+    """
+
+    async def geocode_batch_async(self, session, addresses):
+        import aiohttp
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with session.get(self.request_url(addresses), timeout=timeout) as response:
+            response.raise_for_status()
+            payload = await response.json(content_type=None)
+        return check_rows(addresses, parse_results(payload))
+
+
+def check_rows(addresses, rows):
+    if len(rows) != len(addresses):
+        raise ValueError('expected {} results, got {}'.format(len(addresses), len(rows)))
+    return rows
+
+
+
+# =========
+# GEOCODING
+# =========
+
+
+def geocode(addresses, backend=None, cache=None, batch_size=None, workers=4, rate=5, save=True,
+            retries=4, backoff=0.5, checkpoint=10):
+    """
+    This function returns the zip, lat and long of every
+    address, in order. Addresses whose key is not cached are
+    sent to the backend in batches, by up to workers threads
+    and at most rate requests per second, and cached. Failed
+    requests are retried retries times with exponential
+    backoff. The cache is saved every checkpoint batches and
+    when the run stops, so an interrupted run resumes where it
+    left off.
+    """
+    addresses = pd.Series(addresses)
+    cache = GeocodeCache() if cache is None else cache
+    keys = address_keys(addresses, known=cache.frame.index)
+    backend = MapQuestBackend() if backend is None else backend
+    batches = missing_batches(addresses, keys, cache, batch_size or getattr(backend, 'batch_size', 100))
+
+    if batches:
+        limiter = RateLimiter(rate)
+        lock = threading.Lock()
+        done = 0
+
+        def run(batch):
+            nonlocal done
+            for attempt in range(retries + 1):
+                limiter.wait()
+                try:
+                    rows = backend.geocode_batch(batch.tolist())
+                    break
+                except (OSError, ValueError):
+                    if attempt == retries:
+                        raise
+                    time.sleep(backoff * 2 ** attempt * (1 + random.random()))
+            cache.update(batch_results(batch, rows))
+            with lock:
+                done += 1
+                due = done % checkpoint == 0
+            if save and due:
+                cache.save()
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for _ in executor.map(run, batches):
+                    pass
+        finally:
+            if save:
+                cache.save()
+
+    return cached_results(addresses, keys, cache)
+
+
+def missing_batches(addresses, keys, cache, batch_size):
+    """
+    This function returns the addresses whose key is not
+    cached, one spelling per key, in series of batch_size
+    indexed by key.
+    """
+    missing = cache.missing(keys)
+    if not len(missing):
+        return []
+    first = pd.Series(addresses.values, index=keys.values)
+    first = first[~first.index.duplicated()].loc[missing]
+    return [first.iloc[i:i + batch_size] for i in range(0, len(first), batch_size)]
+
+
+def batch_results(batch, rows):
+    results = pd.DataFrame(rows, columns=COLUMNS, index=pd.Index(batch.index, name='key'))
+    return results.dropna(subset=['lat', 'long'])
+
+
+def cached_results(addresses, keys, cache):
+    found = cache.lookup(keys.values)
+    found.insert(0, 'address', addresses.values)
+    found.index = addresses.index
+    return found
+
+
+async def geocode_async(addresses, backend=None, cache=None, batch_size=None, concurrency=4,
+                        rate=None, retries=4, backoff=0.5, checkpoint=10):
+    """
+    This coroutine geocodes like geocode() but sends the
+    batches over one pooled aiohttp session with at most
+    concurrency requests in flight. Failed requests are retried
+    retries times with exponential backoff. The cache is saved
+    every checkpoint batches and when the run stops, so an
+    interrupted run resumes where it left off. Batches that
+    still fail are left as NaN with a warning.
+
+    In a notebook: found = await geocode.geocode_async(addresses)
+    """
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError('geocode_async needs aiohttp: pip install aiohttp')
+
+    addresses = pd.Series(addresses)
+    cache = GeocodeCache() if cache is None else cache
+    keys = address_keys(addresses, known=cache.frame.index)
+    backend = AsyncMapQuestBackend() if backend is None else backend
+    batches = missing_batches(addresses, keys, cache, batch_size or getattr(backend, 'batch_size', 100))
+    if not batches:
+        return cached_results(addresses, keys, cache)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    done = 0
+
+    async def run(session, batch):
+        nonlocal done
+        async with semaphore:
+            for attempt in range(retries + 1):
+                await limiter.wait_async()
+                try:
+                    rows = await backend.geocode_batch_async(session, batch.tolist())
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                    if attempt == retries:
+                        raise
+                    await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random()))
+        cache.update(batch_results(batch, rows))
+        done += 1
+        if done % checkpoint == 0:
+            await asyncio.to_thread(cache.save)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            outcomes = await asyncio.gather(*[run(session, batch) for batch in batches],
+                                            return_exceptions=True)
+    finally:
+        cache.save()
+    failed = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    for outcome in failed:
+        if not isinstance(outcome, Exception):
+            raise outcome
+    if failed:
+        warnings.warn('{} of {} geocoding batches failed (last error: {}); '
+                      'run again to retry them'.format(len(failed), len(batches), type(failed[-1]).__name__))
+    return cached_results(addresses, keys, cache)
+
+
+def geocode_concurrent(addresses, **kwargs):
+    """
+    This function runs geocode_async() outside a notebook.
+    """
+    return asyncio.run(geocode_async(addresses, **kwargs))
+
+
+
+# ============
+# FAKE SERVICE
+# ============
+
+
+def fake_location(location):
+    """
+    This function returns a made-up but repeatable zip,
+    lat and long for a location string.
+    """
+    digest = hashlib.sha1(location.encode('utf-8')).digest()
+    lat = 29.2 + digest[0] / 255 * 0.6
+    lng = -98.8 + digest[1] / 255 * 0.6
+    return {'postalCode': '78{:03d}'.format(digest[2] % 300),
+            'latLng': {'lat': round(lat, 6), 'lng': round(lng, 6)}}
+
+
+class FakeGeocodeHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            failing = server.fail_every and server.requests % server.fail_every == 0
+        if failing:
+            self.send_error(503)
+            return
+        query = parse_qs(urlparse(self.path).query)
+        locations = query.get('location', [])
+        body = json.dumps({'results': [{'providedLocation': {'location': location},
+                                        'locations': [fake_location(location)]}
+                                       for location in locations]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGeocodeServer:
+    """
+    This class runs a local stand-in for the MapQuest batch
+    geocoding API on a free port, for tests and dry runs.
+    With fail_every=n every nth request gets a 503 error.
+
+        with FakeGeocodeServer() as server:
+            geocode(addresses, backend=MapQuestBackend(key='', url=server.url))
+    """
+
+    handler = FakeGeocodeHandler
+
+    def __init__(self, host='127.0.0.1', port=0, fail_every=0):
+        self.httpd = ThreadingHTTPServer((host, port), self.handler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = 0
+        self.httpd.fail_every = fail_every
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://{}:{}/geocoding/v1/batch'.format(host, port)
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following workbook:
+
+1. SAWS Analysis.twb
+
+It bins geocoded spills into square, hexagonal or web map tile
+cells and aggregates them per cell and time bucket, so the
+workbook can plot a few thousand cells instead of every spill.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+
+import pandas as pd
+import numpy as np
+
+
+
+# =====
+# CELLS
+# =====
+
+
+# south-west corner of the square grid, well outside Bexar County
+ORIGIN_LAT = 28.0
+ORIGIN_LON = -100.0
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+
+CELL_BITS = 32
+
+# added to signed rows and columns so that points west or south
+# of the origin pack into non-negative ids too
+OFFSET = 1 << (CELL_BITS - 2)
+
+
+def pack(row, col):
+    """
+    This function packs two int arrays with values in
+    [0, 2**31) into one non-negative int64 cell id.
+    """
+    row = np.asarray(row).astype('int64')
+    col = np.asarray(col).astype('int64')
+    limit = 1 << (CELL_BITS - 1)
+    if ((row < 0) | (row >= limit) | (col < 0) | (col >= limit)).any():
+        raise ValueError('cell rows and columns must be in [0, {}) to pack'.format(limit))
+    return (row << CELL_BITS) | col
+
+
+def unpack(cell):
+    cell = np.asarray(cell, dtype='int64')
+    return cell >> CELL_BITS, cell & ((1 << CELL_BITS) - 1)
+
+
+def square_cells(lat, lon, size=0.01):
+    """
+    This function returns the id of the size x size degree
+    square that holds every point (-1 without coordinates).
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    located = ~(np.isnan(lat) | np.isnan(lon))
+    row = np.floor((np.where(located, lat, ORIGIN_LAT) - ORIGIN_LAT) / size)
+    col = np.floor((np.where(located, lon, ORIGIN_LON) - ORIGIN_LON) / size)
+    return np.where(located, pack(row + OFFSET, col + OFFSET), -1)
+
+
+def square_centers(cell, size=0.01):
+    row, col = unpack(cell)
+    return ORIGIN_LAT + (row - OFFSET + 0.5) * size, ORIGIN_LON + (col - OFFSET + 0.5) * size
+
+
+def tile_cells(lat, lon, zoom):
+    """
+    This function returns the id (y * 2**zoom + x) of the web
+    map tile that holds every point (-1 without coordinates).
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    located = ~(np.isnan(lat) | np.isnan(lon))
+    n = 2 ** zoom
+    lat_rad = np.radians(np.where(located, lat, 0.0))
+    x = np.floor((np.where(located, lon, 0.0) + 180.0) / 360.0 * n)
+    y = np.floor((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n)
+    x = np.clip(x, 0, n - 1).astype('int64')
+    y = np.clip(y, 0, n - 1).astype('int64')
+    return np.where(located, y * n + x, -1)
+
+
+def tile_centers(cell, zoom):
+    n = 2 ** zoom
+    cell = np.asarray(cell, dtype='int64')
+    x, y = cell % n + 0.5, cell // n + 0.5
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    return lat, x / n * 360.0 - 180.0
+
+
+def hex_cells(lat, lon, size=0.5):
+    """
+    This function returns the id of the pointy-top hexagon of
+    size km (centre to corner) that holds every point
+    (-1 without coordinates), using axial coordinates on a
+    local flat projection.
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    located = ~(np.isnan(lat) | np.isnan(lon))
+    x = (np.where(located, lon, ORIGIN_LON) - ORIGIN_LON) * KM_PER_DEGREE_LON * np.cos(np.radians(ORIGIN_LAT))
+    y = (np.where(located, lat, ORIGIN_LAT) - ORIGIN_LAT) * KM_PER_DEGREE_LAT
+    q = (np.sqrt(3) / 3 * x - y / 3) / size
+    r = (2 / 3 * y) / size
+
+    # round the cube coordinates (q, r, -q-r) to the nearest hexagon
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return np.where(located, pack(rr + OFFSET, rq + OFFSET), -1)
+
+
+def hex_centers(cell, size=0.5):
+    rr, rq = unpack(cell)
+    r, q = rr - OFFSET, rq - OFFSET
+    x = size * np.sqrt(3) * (q + r / 2)
+    y = size * 1.5 * r
+    lon = ORIGIN_LON + x / (KM_PER_DEGREE_LON * np.cos(np.radians(ORIGIN_LAT)))
+    return ORIGIN_LAT + y / KM_PER_DEGREE_LAT, lon
+
+
+
+# ===========
+# AGGREGATION
+# ===========
+
+
+def aggregate_cells(spills, cells, freq='M', time='report_date', gallons='total_gallons',
+                    cause='root_cause', top=3):
+    """
+    This function returns one row per cell and time bucket
+    (freq, e.g. 'M' or 'Y'; None for all time) with the spill
+    count, the total gallons and the top root causes.
+    Spills without a cell (-1) are left out; spills without a
+    root cause are counted but do not compete as a cause.
+    """
+    keys = {'cell': np.asarray(cells, dtype='int64')}
+    if freq is not None:
+        keys['period'] = pd.to_datetime(spills[time]).dt.to_period(freq).dt.start_time.to_numpy()
+    frame = pd.DataFrame({**keys,
+                          'gallons': spills[gallons].to_numpy(),
+                          'cause': spills[cause].astype('string').to_numpy()})
+    frame = frame[frame['cell'] >= 0]
+    by = list(keys)
+
+    totals = frame.groupby(by).agg(spills=('gallons', 'size'), total_gallons=('gallons', 'sum'))
+    causes = frame.dropna(subset=['cause']).groupby(by + ['cause']).size().rename('count').reset_index()
+    causes = causes.sort_values(by + ['count', 'cause'], ascending=[True] * len(by) + [False, True])
+    causes = causes.groupby(by).head(top)
+    totals['top_root_cause'] = causes.groupby(by)['cause'].first()
+    totals['top_root_causes'] = causes.groupby(by)['cause'].agg(', '.join)
+    return totals.reset_index()
+
+
+def build_tiles(spills, zooms=(10, 12, 14), freq='Y', lat='lat', lon='long', **kwargs):
+    """
+    This function returns the spill aggregates of every web
+    map tile at each zoom level, with the tile centres,
+    ready to export to the workbook instead of raw points.
+    """
+    frames = []
+    for zoom in zooms:
+        tiles = aggregate_cells(spills, tile_cells(spills[lat], spills[lon], zoom), freq=freq, **kwargs)
+        tiles['lat'], tiles['long'] = tile_centers(tiles['cell'], zoom)
+        tiles.insert(0, 'zoom', zoom)
+        frames.append(tiles)
+    return pd.concat(frames, ignore_index=True)
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
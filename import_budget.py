@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+"""
+This script is run on its own; no other script imports it.
+
+It measures how long a cold import of each helper module
+takes, each in a fresh interpreter, and fails when one of
+them goes over its budget, so a heavy import at module level
+(matplotlib, seaborn, sklearn, ...) is caught before it slows
+down every batch job:
+
+    python import_budget.py
+    python import_budget.py spatial --repeat 5
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+import argparse
+import subprocess
+
+
+
+# =======
+# BUDGETS
+# =======
+
+
+# seconds over the cost of importing pandas and numpy, which
+# every module needs; heavy libraries must be imported lazily
+BUDGETS = {'cache': 0.15,
+           'sources': 0.15,
+           'schemas': 0.15,
+           'acquire_sso': 0.3,
+           'acquire_sara': 0.3,
+           'acquire_aqi': 0.3,
+           'prepare_core': 0.15,
+           'prepare_sso': 0.3,
+           'prepare_sara': 0.3,
+           'prepare_aqi': 0.3,
+           'addresses': 0.15,
+           'rainfall': 0.15,
+           'spatial': 0.15,
+           'rain_features': 0.15,
+           'repeat_spills': 0.15,
+           'grid': 0.15,
+           'windows': 0.15,
+           'geocode': 0.3,
+           'ingest': 0.3,
+           'sso_store': 0.3,
+           'pipeline': 0.3,
+           'proof_of_concept_helpers': 0.15,
+           }
+
+BASELINE = 'pandas, numpy'
+
+TIMER = ('import time; start = time.perf_counter(); import {}; '
+         'print(time.perf_counter() - start)')
+
+
+def import_time(module, repeat=3):
+    """
+    This function returns the fastest of repeat cold imports
+    of module, each in a new interpreter.
+    """
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', TIMER.format(module)], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode != 0:
+            raise ImportError('importing {} failed:\n{}'.format(module, result.stderr))
+        times.append(float(result.stdout.split()[-1]))
+    return min(times)
+
+
+def check_budgets(modules=None, repeat=3):
+    """
+    This function returns the baseline import time and a
+    (module, seconds, seconds over the baseline, budget,
+    over budget) row for every module.
+    """
+    modules = modules or list(BUDGETS)
+    baseline = import_time(BASELINE, repeat)
+    rows = []
+    for module in modules:
+        seconds = import_time(module, repeat)
+        budget = BUDGETS.get(module, min(BUDGETS.values()))
+        extra = max(seconds - baseline, 0.0)
+        rows.append((module, seconds, extra, budget, extra > budget))
+    return baseline, rows
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main(argv=None):
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description='Check the cold import time of the helper modules.')
+    parser.add_argument('modules', nargs='*', help='modules to check (default all of BUDGETS)')
+    parser.add_argument('--repeat', type=int, default=3, help='imports per module, the fastest counts')
+    args = parser.parse_args(argv)
+
+    baseline, rows = check_budgets(args.modules, args.repeat)
+    print('baseline ({}): {:.3f}s'.format(BASELINE, baseline))
+    print('{:<28}{:>9}{:>9}{:>9}'.format('module', 'total', 'extra', 'budget'))
+    for module, seconds, extra, budget, over in rows:
+        print('{:<28}{:>9.3f}{:>9.3f}{:>9.3f}{}'.format(module, seconds, extra, budget,
+                                                        '  OVER BUDGET' if over else ''))
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
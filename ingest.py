@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. dd-sara.ipynb
+2. master-sso.ipynb
+3. dd-aqi-36.ipynb
+
+It reads the SAWS, SARA and COSA files of a manifest in
+parallel. Every file is parsed in its own process with the
+read_data() of its acquire module, which leaves a columnar
+copy in the csv cache (see cache.py); the process hands back
+only the name of that copy and the frame is read from it,
+instead of pickling the frame back to the caller:
+
+    frames = ingest.ingest()
+    flood, details = frames['flood'], frames['rain_details']
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import re
+import sys
+import hashlib
+import warnings
+import importlib
+
+from concurrent.futures import ProcessPoolExecutor
+
+import cache
+import sources
+
+
+
+# ========
+# MANIFEST
+# ========
+
+
+MANIFEST = {'sso': ('acquire_sso', 'SAWS_SSOs_2009-2018Mar_UploadData.csv'),
+            'saws_sso': ('acquire_sso', 'saws-sso.csv'),
+            'flood': ('acquire_sara', 'sara-flood-stage-levels.csv'),
+            'rain_details': ('acquire_sara', 'sara-rainfall-details.csv'),
+            'rain_summary': ('acquire_sara', 'sara-rainfall-summary.csv'),
+            'water_quality': ('acquire_sara', 'sara-water-quality-bexar.csv'),
+            'aqi': ('acquire_aqi', 'cosa-air-quality.csv'),
+            }
+
+
+def source_files(filename):
+    """
+    This function returns the files of a manifest entry (see
+    sources.py), or an empty list when there are none.
+    """
+    try:
+        return sources.source_paths(filename)
+    except FileNotFoundError:
+        return []
+
+
+
+# =========
+# INGESTION
+# =========
+
+
+def handoff_path(filename, paths):
+    """
+    This function returns the file name under which the
+    stacked files of a glob pattern are handed back. It is
+    keyed on the pattern and on the size and mtime of every
+    file it matches.
+    """
+    pattern = os.path.join(os.path.dirname(paths[0]), re.sub(r'[^\w.-]', '_', os.path.basename(filename)))
+    key = '{}-{}'.format(cache.file_version(*paths), hashlib.sha1(filename.encode('utf-8')).hexdigest()[:8])
+    return cache.cache_path(pattern, key)
+
+
+def load_source(module, filename):
+    """
+    This function parses one file in a worker process and
+    returns the name of its cached columnar copy. Glob
+    patterns, which stack several files, are saved once more
+    as a whole under a name of their own (see handoff_path).
+    """
+    frame = importlib.import_module(module).read_data(filename)
+    paths = sources.source_paths(filename)
+    cached = frame.attrs.get('cache_path') if len(paths) == 1 else None
+    if cached is None:
+        cached = cache.write_cache(frame, handoff_path(filename, paths))
+    return cached
+
+
+def ingest(manifest=MANIFEST, workers=None, names=None):
+    """
+    This function reads the files of a manifest ({name:
+    (acquire module, filename)}) in a process pool and returns
+    {name: dataframe}. The largest files are started first, so
+    the wall time approaches that of the largest file. Files
+    that do not exist are left out with a warning.
+    """
+    entries = {}
+    for name, (module, filename) in manifest.items():
+        if names is not None and name not in names:
+            continue
+        if not source_files(filename):
+            warnings.warn('{} not found, {} is left out'.format(filename, name))
+            continue
+        entries[name] = (module, filename)
+    size = {name: sum(os.path.getsize(path) for path in source_files(entries[name][1])) for name in entries}
+    order = sorted(entries, key=lambda name: -size[name])
+
+    workers = min(workers or os.cpu_count() or 1, len(order) or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(load_source, *entries[name]) for name in order}
+        return {name: cache.read_cache(futures[name].result()) for name in entries}
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
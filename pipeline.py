@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following scripts:
+
+1. acquire_sso.py, acquire_sara.py, acquire_aqi.py
+2. prepare_sso.py, prepare_sara.py, prepare_aqi.py
+3.
+
+It runs acquire -> prepare -> export for a dataset without a
+notebook, so the data can be refreshed by a scheduled job:
+
+    python pipeline.py sso --format parquet
+    python pipeline.py sso --incremental
+    python acquire_sara.py --jobs 4 --output data/ready
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+import time
+import argparse
+import importlib
+
+import cache
+import ingest
+import sources
+import sso_store
+
+
+
+# ========
+# PIPELINE
+# ========
+
+
+DATASETS = {'sso': ['sso'],
+            'sara': ['flood', 'rain_details', 'rain_summary', 'water_quality'],
+            'aqi': ['aqi'],
+            }
+
+PREPARE = {'acquire_sso': 'prepare_sso',
+           'acquire_sara': 'prepare_sara',
+           'acquire_aqi': 'prepare_aqi',
+           }
+
+FORMATS = ['csv', 'parquet', 'pickle']
+
+
+def missing(dataset):
+    """
+    This function returns the names of dataset whose source
+    files are not in the data directory.
+    """
+    return [name for name in DATASETS[dataset] if not ingest.source_files(ingest.MANIFEST[name][1])]
+
+
+def acquire(names, jobs=1, use_cache=True):
+    """
+    This function reads the manifest files of names, in a
+    process pool when jobs > 1 (see ingest.py).
+    """
+    if jobs > 1 and use_cache:
+        return ingest.ingest(names=names, workers=jobs)
+    frames = {}
+    for name in names:
+        module, filename = ingest.MANIFEST[name]
+        if not ingest.source_files(filename):
+            print('{} not found, {} is left out'.format(filename, name), file=sys.stderr)
+            continue
+        frames[name] = importlib.import_module(module).read_data(filename, use_cache=use_cache)
+    return frames
+
+
+def prepare(frames, use_cache=True):
+    """
+    This function cleans every frame with the prepare()
+    function of the prepare module of its dataset.
+    """
+    prepared = {}
+    for name, df in frames.items():
+        module = importlib.import_module(PREPARE[ingest.MANIFEST[name][0]])
+        prepared[name] = module.prepare(df, use_cache=use_cache)
+    return prepared
+
+
+def export(frames, output, fmt='csv'):
+    """
+    This function writes every frame to <output>/<name>.<fmt>
+    and returns the file names. A frame that parquet cannot
+    hold raises instead of being written in another format.
+    """
+    os.makedirs(output, exist_ok=True)
+    written = []
+    for name, df in frames.items():
+        target = os.path.join(output, '{}.{}'.format(name, fmt))
+        if fmt == 'csv':
+            df.to_csv(target, index=False)
+        else:
+            target = cache.save_frame(df, target, fallback=False)
+        written.append(target)
+    return written
+
+
+def run(dataset, jobs=1, use_cache=True, fmt='csv', output=None, raw=False, incremental=False):
+    """
+    This function runs acquire -> prepare -> export for a
+    dataset and returns the names of the written files.
+    With incremental the SSO snapshot is merged into the
+    partitioned store instead (see sso_store.py). output
+    defaults to <data directory>/ready.
+    """
+    if output is None:
+        output = os.path.join(sources.data_root(), 'ready')
+    frames = acquire(DATASETS[dataset], jobs=jobs, use_cache=use_cache)
+    if incremental:
+        store = sso_store.SSOStore()
+        written = []
+        for df in frames.values():
+            summary = store.update(df)
+            print('{new} new and {changed} changed spills of {rows}'.format(**summary), file=sys.stderr)
+            written += [store.partition_path(partition) for partition in summary['partitions']]
+        return written
+    if not raw:
+        frames = prepare(frames, use_cache=use_cache)
+    return export(frames, output, fmt=fmt)
+
+
+def parse_args(argv=None, dataset=None):
+    """
+    This function parses the command line. The dataset
+    argument is only asked for when dataset is None.
+    """
+    parser = argparse.ArgumentParser(description='Acquire, prepare and export a dataset.')
+    if dataset is None:
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of files read in parallel (default 1)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='parse and clean everything again, ignoring the caches')
+    parser.add_argument('-f', '--format', dest='fmt', choices=FORMATS, default='csv',
+                        help='output format (default csv)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='output directory (default <data directory>/ready)')
+    parser.add_argument('--raw', action='store_true',
+                        help='export the acquired data without preparing it')
+    parser.add_argument('--incremental', action='store_true',
+                        help='merge only new and changed spills into the sso store')
+    args = parser.parse_args(argv)
+    if dataset is not None:
+        args.dataset = dataset
+    if args.incremental and args.dataset != 'sso':
+        parser.error('--incremental only applies to the sso dataset')
+    return args
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main(argv=None, dataset=None):
+    """
+    Main entry point for the script. It exits with 1 when a
+    file of the dataset is missing or nothing was written (an
+    incremental refresh without changes is not an error).
+    """
+    args = parse_args(argv, dataset)
+    left_out = missing(args.dataset)
+    start = time.time()
+    written = run(args.dataset, jobs=args.jobs, use_cache=args.use_cache, fmt=args.fmt,
+                  output=args.output, raw=args.raw, incremental=args.incremental)
+    for target in written:
+        print(target)
+    print('{} files in {:.1f}s'.format(len(written), time.time() - start), file=sys.stderr)
+    if left_out:
+        print('missing: {}'.format(', '.join(left_out)), file=sys.stderr)
+        return 1
+    if not written and not args.incremental:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+
+"""
+This script contains code shared by the prepare scripts:
+
+1. prepare_sso.py
+2. prepare_sara.py
+3. prepare_aqi.py
+
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+
+import pandas as pd
+import numpy as np
+
+
+
+# ===========
+# PREPARATION
+# ===========
+
+
+# (count column, percentage column, strings that count as missing)
+MISSING_SENTINELS = [('num_empty', 'empty_percentage', (' ', '')),
+                     ('nan_count', 'nan_percentage', ('nan', 'NaN')),
+                     ]
+
+DASH_SENTINELS = [('num_empty', 'empty_percentage', (' ', '')),
+                  ('dash_count', 'dash_percentage', ('-',)),
+                  ]
+
+
+def tally_missing(series, sentinels):
+    """
+    This function counts the nulls and the sentinel strings
+    of a column in one pass. String columns are factorized
+    once and only their distinct values are compared.
+    """
+    counts = np.zeros(1 + len(sentinels), dtype='int64')
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        codes, uniques = pd.factorize(series)
+    else:
+        counts[0] = series.isna().sum()
+        return counts
+    tally = np.bincount(codes + 1, minlength=len(uniques) + 1)
+    counts[0] = tally[0]
+    uniques = pd.Index(uniques, dtype=object)
+    for i, (_, _, values) in enumerate(sentinels):
+        counts[i + 1] = tally[1:][uniques.isin(values)].sum()
+    return counts
+
+
+def missing_values_col(df, sentinels=MISSING_SENTINELS, sample=None, random_state=None):
+    """
+    This functions returns the total missing values and
+    the percent missing values by column.
+
+    Pass sample (a number of rows) to estimate the
+    report of a very large frame from a random sample.
+    """
+    nrows = df.shape[0]
+    if sample is not None and sample < nrows:
+        df = df.sample(n=sample, random_state=random_state)
+    counts = np.array([tally_missing(df.iloc[:, i], sentinels) for i in range(df.shape[1])],
+                      dtype='float64').reshape(df.shape[1], 1 + len(sentinels))
+    if df.shape[0] != nrows:
+        counts = np.round(counts * nrows / df.shape[0])
+    counts = counts.astype('int64')
+
+    report = {}
+    names = [('num_missing', 'missing_percentage')] + [(c, p) for c, p, _ in sentinels]
+    for i, (count_name, percentage_name) in enumerate(names):
+        report[count_name] = pd.Series(counts[:, i], index=df.columns)
+        report[percentage_name] = report[count_name] / nrows * 100
+    return pd.DataFrame(report)
+
+
+def missing_values_row(df):
+    """
+    This functions returns the total missing values and
+    the percent missing values by row.
+    """
+    null_count = df.isnull().sum(axis=1)
+    null_percentage = (null_count / df.shape[1]) * 100
+    return pd.DataFrame({'num_missing': null_count, 'percentage': null_percentage})
+
+
+def handle_missing_threshold(df, prop_required_column = .3, prop_required_row = .9):
+    """
+    This functions removes columns and rows whose
+    count of missing values exceeds threshold.
+    """
+    threshold = int(round(prop_required_column*len(df.index),0))
+    df.dropna(axis=1, thresh=threshold, inplace=True)
+    threshold = int(round(prop_required_row*len(df.columns),0))
+    df.dropna(axis=0, thresh=threshold, inplace=True)
+    return df
+
+
+def count_values(df):
+    """
+    This function counts the value of columns in a dataframe.
+    """
+    for col in df.columns:
+        n = df[col].unique().shape[0]
+        col_bins = min(n, 10)
+        print(f"{col}:")
+        if df[col].dtype in ['int64', 'float64'] and n > 10:
+            print(df[col].value_counts(bins=col_bins, sort=False))
+        else:
+            print(df[col].value_counts())
+        print("\n")
+
+def remove_columns(df, columns):
+    return df.drop(columns=columns)
+
+
+def fill_values(df, values):
+    """
+    This function fills the NaN values of several columns
+    in one fillna call, given a dict of column: value.
+    Categorical columns get the value added as a category.
+    """
+    values = {col: value for col, value in values.items() if df[col].hasnans}
+    if not values:
+        return df
+    for col, value in values.items():
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and value not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([value])
+    columns = list(values)
+    df[columns] = df[columns].fillna(values)
+    return df
+
+
+def fill_with_zeroes(df, *cols):
+    """
+    This functions returns the column names as input and
+    return the dataframe with the
+    null values in those columns replace by 0.
+    """
+    return fill_values(df, dict.fromkeys(cols, 0))
+
+
+def fill_with_median(df, *cols):
+    """
+    This function fills the NaN values with
+    respective median values.
+    """
+    return fill_values(df, df[list(cols)].median().to_dict())
+
+
+def fill_with_none(df, *cols):
+    """
+    This function fills the NaN values with
+    'None' string value.
+    """
+    return fill_values(df, dict.fromkeys(cols, 'None'))
+
+def fill_with_unknown(df, *cols):
+    """
+    This functions fills the NaN values with
+    'Unknown' string value.
+    """
+    return fill_values(df, dict.fromkeys(cols, 'Unknown'))
+
+
+def map_strings(df, columns, method):
+    """
+    This function applies a pandas string method ('lower',
+    'title', ...) to several columns at once. Categorical
+    columns only transform their categories; the other columns
+    are factorized together and only the distinct values are
+    transformed.
+    """
+    columns = list(dict.fromkeys(columns))
+    categorical = [col for col in columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    plain = [col for col in columns if col not in categorical]
+
+    for col in categorical:
+        categories = getattr(df[col].cat.categories.astype(object).str, method)()
+        if categories.is_unique:
+            df[col] = df[col].cat.rename_categories(categories)
+        else:
+            merged = pd.Index(categories.unique())
+            codes = merged.get_indexer(categories)[df[col].cat.codes.to_numpy()]
+            codes[df[col].isna().to_numpy()] = -1
+            df[col] = pd.Categorical.from_codes(codes, categories=merged)
+
+    if plain:
+        values = df[plain].to_numpy(dtype=object).ravel(order='F')
+        codes, uniques = pd.factorize(values)
+        mapped = getattr(pd.Series(uniques, dtype=object).str, method)().to_numpy(dtype=object)
+        mapped = np.append(mapped, np.nan)[codes]
+        block = pd.DataFrame(mapped.reshape(len(df), len(plain), order='F'),
+                             index=df.index, columns=plain)
+        string_dtypes = {col: df[col].dtype for col in plain
+                         if df[col].dtype != object and pd.api.types.is_string_dtype(df[col].dtype)}
+        df[plain] = block.astype(string_dtypes) if string_dtypes else block
+    return df
+
+
+def lowercase_columns(df):
+    """
+    This function returns a lowercase version of the column values.
+    """
+    df.columns = map(str.lower, df.columns)
+    return df
+
+def lowercase_column_values(df, *columns):
+    """
+    This function returns a lowercase version of the column values.
+    """
+    return map_strings(df, columns, 'lower')
+
+def titlecase_column_values(df, *columns):
+    """
+    This function returns a titlecase version of the values.
+    """
+    return map_strings(df, columns, 'title')
+
+
+def parse_dates(df, *columns):
+    """
+    This function converts the columns to datetime,
+    skipping the ones the reader already parsed.
+    """
+    for col in columns:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def rename_columns(df, columns):
+    """
+    This function renames the columns of the dataframe
+    with a dict of old name: new name.
+    """
+    return df.rename(index=str, columns=columns)
+
+
+def parse_numbers(df, *cols):
+    """
+    This function converts columns that mix numbers and
+    number strings with thousands separators to floats.
+    Values that are not numbers become NaN.
+    """
+    for col in cols:
+        text = df[col].astype(object).where(df[col].isna(), df[col].astype(str).str.replace(',', ''))
+        df[col] = pd.to_numeric(text, errors='coerce')
+    return df
+
+
+def run_spec(df, spec):
+    """
+    This function cleans a dataframe with a spec, a dict of
+    steps that run in this order, each in a single pass:
+
+    derive:    {new column: function of the input dataframe}
+    drop:      [columns]
+    rename:    {old name: new name}
+    lowercase: [columns]
+    titlecase: [columns]
+    numeric:   [columns of numbers read as text, e.g. '-5,332.50']
+    fill:      {column: value for the NaN values}
+    astype:    {column: type}
+    dates:     [columns]
+
+    The kept and derived columns are gathered into one new
+    dataframe; the input dataframe is not modified.
+    """
+    derived = {name: func(df) for name, func in spec.get('derive', {}).items()}
+    drop = set(spec.get('drop', [])) | set(derived)
+    keep = [col for col in df.columns if col not in drop]
+    df = pd.concat([df[keep], pd.DataFrame(derived, index=df.index)], axis=1)
+
+    rename = spec.get('rename', {})
+    if rename:
+        df.columns = [rename.get(col, col) for col in df.columns]
+    if spec.get('lowercase'):
+        df = map_strings(df, spec['lowercase'], 'lower')
+    if spec.get('titlecase'):
+        df = map_strings(df, spec['titlecase'], 'title')
+    if spec.get('numeric'):
+        df = parse_numbers(df, *spec['numeric'])
+    if spec.get('fill'):
+        df = fill_values(df, spec['fill'])
+    if spec.get('astype'):
+        columns = list(spec['astype'])
+        df[columns] = df[columns].astype(spec['astype'])
+    return parse_dates(df, *spec.get('dates', []))
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
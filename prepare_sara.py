@@ -22,6 +22,14 @@ import sys
 import pandas as pd
 import numpy as np
 
+import prepare_core
+import pipeline
+from prepare_core import (missing_values_row, handle_missing_threshold, count_values,
+                          remove_columns, fill_with_zeroes, fill_with_median,
+                          fill_with_none, fill_with_unknown, lowercase_columns,
+                          lowercase_column_values, titlecase_column_values,
+                          parse_dates)
+
 
 
 # ===========
@@ -29,140 +37,32 @@ import numpy as np
 # ===========
 
 
-def missing_values_col(df):
+def missing_values_col(df, sentinels=prepare_core.DASH_SENTINELS, sample=None, random_state=None):
     """
     This functions returns the total missing values and
     the percent missing values by column.
     """
-    null_count = df.isnull().sum()
-    null_percentage = (null_count / df.shape[0]) * 100
-    empty_count = pd.Series(((df == ' ') | (df == '')).sum())
-    empty_percentage = (empty_count / df.shape[0]) * 100
-    nan_count = pd.Series((df == '-').sum())
-    nan_percentage = (nan_count / df.shape[0]) * 100
-    return pd.DataFrame({'num_missing': null_count, 'missing_percentage': null_percentage,
-                         'num_empty': empty_count, 'empty_percentage': empty_percentage,
-                         'dash_count': nan_count, 'dash_percentage': nan_percentage})
-
-
-def missing_values_row(df):
-    """
-    This functions returns the total missing values and
-    the percent missing values by row.
-    """
-    null_count = df.isnull().sum(axis=1)
-    null_percentage = (null_count / df.shape[1]) * 100
-    return pd.DataFrame({'num_missing': null_count, 'percentage': null_percentage})
-
-
-def handle_missing_threshold(df, prop_required_column = .3, prop_required_row = .9):
-    """
-    This functions removes columns and rows whose
-    count of missing values exceeds threshold.
-    """
-    threshold = int(round(prop_required_column*len(df.index),0))
-    df.dropna(axis=1, thresh=threshold, inplace=True)
-    threshold = int(round(prop_required_row*len(df.columns),0))
-    df.dropna(axis=0, thresh=threshold, inplace=True)
-    return df
-
-
-def count_values(df):
-    """
-    This function counts the value of columns in a dataframe.
-    """
-    for col in df.columns:
-        n = df[col].unique().shape[0]
-        col_bins = min(n, 10)
-        print(f"{col}:")
-        if df[col].dtype in ['int64', 'float64'] and n > 10:
-            print(df[col].value_counts(bins=col_bins, sort=False))
-        else:
-            print(df[col].value_counts())
-        print("\n")
-
-def remove_columns(df, columns):
-    return df.drop(columns=columns)
-
-
-def fill_with_zeroes(df, *cols):
-    """
-    This functions returns the column names as input and
-    return the dataframe with the
-    null values in those columns replace by 0.
-    """
-    for col in cols:
-        df[col] = df[col].fillna(0)
-    return df
-
-
-def fill_with_median(df, *cols):
-    """
-    This function fills the NaN values with
-    respective median values.
-    """
-    for col in cols:
-        df[col] = df[col].fillna(df[col].median())
-    return df
-
+    return prepare_core.missing_values_col(df, sentinels, sample=sample, random_state=random_state)
 
-def fill_with_none(df, *cols):
-    """
-    This function fills the NaN values with
-    'None' string value.
-    """
-    for col in cols:
-        df[col] = df[col].fillna('None')
-    return df
 
-def fill_with_unknown(df, *cols):
-    """
-    This functions fills the NaN values with
-    'Unknown' string value.
-    """
-    for col in cols:
-        df[col] = df[col].fillna('Unknown')
-    return df
-
-def lowercase_columns(df):
-    """
-    This function returns a lowercase version of the column values.
-    """
-    df.columns = map(str.lower, df.columns)
-    return df
-
-def lowercase_column_values(df, *columns):
-    """
-    This function returns a lowercase version of the column values.
-    """
-    for col in columns:
-        df[col] = df[col].str.lower() 
-    return df
-
-def titlecase_column_values(df, *columns):
-    """
-    This function returns a titlecase version of the values.
-    """
-    for col in columns:
-        df[col] = df[col].str.title() 
-    return df
+RENAME_COLUMNS = {'station id':'station_id',
+                  'end date':'date',
+                  'oxygen, dissolved (mg/l) (00300)':'oxygen',
+                  'e. coli, colilert, idexx method, mpn/100ml (31699)':'ecoli_idexx',
+                  'e coli,na+mug or ea+mug,24hrs, 35 degree (#/100m (31700)':'ecoli_mug',
+                  'e coli, sediment, mpn/100g (31702)':'ecoli_sediment',
+                  'e.coli, colilert, idexx, holding time (31704)':'ecoili_holding_time',
+                  'days since precipitation event (days) (72053)':'days_since_precipitation',
+                  'present weather (1=clear,2=ptcldy,3=cldy,4=rain,5=other) (89966)':'present_weather',
+                  'water color 1=brwn 2=red 3=grn 4=blck 5=clr 6=ot (89969)':'water_color',
+                  }
 
 
 def rename_columns_all(df):
     """
     takes in selected dataframe and renames columns to intuitive non-capitalized titles
     """
-    return df.rename(index=str, columns={'station id':'station_id',
-                                         'end date':'date',
-                                         'oxygen, dissolved (mg/l) (00300)':'oxygen',
-                                         'e. coli, colilert, idexx method, mpn/100ml (31699)':'ecoli_idexx',
-                                         'e coli,na+mug or ea+mug,24hrs, 35 degree (#/100m (31700)':'ecoli_mug',
-                                         'e coli, sediment, mpn/100g (31702)':'ecoli_sediment',
-                                         'e.coli, colilert, idexx, holding time (31704)':'ecoili_holding_time',
-                                         'days since precipitation event (days) (72053)':'days_since_precipitation',
-                                         'present weather (1=clear,2=ptcldy,3=cldy,4=rain,5=other) (89966)':'present_weather',
-                                         'water color 1=brwn 2=red 3=grn 4=blck 5=clr 6=ot (89969)':'water_color',
-                                        })
+    return prepare_core.rename_columns(df, RENAME_COLUMNS)
 def lowercase_and_rename(df):
     """
     This function changes the column names' case to lowercase
@@ -170,6 +70,15 @@ def lowercase_and_rename(df):
     """
     return rename_columns_all(lowercase_columns(df))
 
+def prepare(df, use_cache=True):
+    """
+    This function cleans a raw SARA dataframe from
+    acquire_sara.read_data() for the pipeline (see
+    pipeline.py). The SARA files only need their
+    columns renamed.
+    """
+    return lowercase_and_rename(df.copy())
+
 def ready_df1(df):
     """
     This function prepares the dataframe for EDA.
@@ -242,9 +151,9 @@ def ready_df1(df):
 def clear():
       os.system("cls" if os.name == "nt" else "clear")
 
-def main():
+def main(argv=None):
     """Main entry point for the script."""
-    pass
+    return pipeline.main(argv, dataset='sara')
 
 
 if __name__ == '__main__':
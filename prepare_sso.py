@@ -22,6 +22,16 @@ import sys
 import pandas as pd
 import numpy as np
 
+import cache
+import pipeline
+import addresses
+import prepare_core
+from prepare_core import (missing_values_row, handle_missing_threshold, count_values,
+                          remove_columns, fill_values, fill_with_zeroes, fill_with_median,
+                          fill_with_none, fill_with_unknown, lowercase_columns,
+                          lowercase_column_values, titlecase_column_values,
+                          parse_dates)
+
 
 
 # ===========
@@ -29,271 +39,204 @@ import numpy as np
 # ===========
 
 
-def missing_values_col(df):
+def missing_values_col(df, sentinels=prepare_core.MISSING_SENTINELS, sample=None, random_state=None):
     """
     This functions returns the total missing values and
     the percent missing values by column.
     """
-    null_count = df.isnull().sum()
-    null_percentage = (null_count / df.shape[0]) * 100
-    empty_count = pd.Series(((df == ' ') | (df == '')).sum())
-    empty_percentage = (empty_count / df.shape[0]) * 100
-    nan_count = pd.Series(((df == 'nan') | (df == 'NaN')).sum())
-    nan_percentage = (nan_count / df.shape[0]) * 100
-    return pd.DataFrame({'num_missing': null_count, 'missing_percentage': null_percentage,
-                         'num_empty': empty_count, 'empty_percentage': empty_percentage,
-                         'nan_count': nan_count, 'nan_percentage': nan_percentage})
-
-
-def missing_values_row(df):
-    """
-    This functions returns the total missing values and
-    the percent missing values by row.
-    """
-    null_count = df.isnull().sum(axis=1)
-    null_percentage = (null_count / df.shape[1]) * 100
-    return pd.DataFrame({'num_missing': null_count, 'percentage': null_percentage})
-
-
-def handle_missing_threshold(df, prop_required_column = .3, prop_required_row = .9):
-    """
-    This functions removes columns and rows whose
-    count of missing values exceeds threshold.
-    """
-    threshold = int(round(prop_required_column*len(df.index),0))
-    df.dropna(axis=1, thresh=threshold, inplace=True)
-    threshold = int(round(prop_required_row*len(df.columns),0))
-    df.dropna(axis=0, thresh=threshold, inplace=True)
-    return df
-
-
-def count_values(df):
-    """
-    This function counts the value of columns in a dataframe.
-    """
-    for col in df.columns:
-        n = df[col].unique().shape[0]
-        col_bins = min(n, 10)
-        print(f"{col}:")
-        if df[col].dtype in ['int64', 'float64'] and n > 10:
-            print(df[col].value_counts(bins=col_bins, sort=False))
-        else:
-            print(df[col].value_counts())
-        print("\n")
-
-def remove_columns(df, columns):
-    return df.drop(columns=columns)
+    return prepare_core.missing_values_col(df, sentinels, sample=sample, random_state=random_state)
+
+
+RENAME_COLUMNS = {'inspkey':'inspection_key',
+                  'servno':'service_number',
+                  'reportdate':'report_date',
+                  'spill_st_name':'spill_street_name',
+                  'total_gal':'total_gallons',
+                  'galsret':'gallons_returned',
+                  'gal':'gallons_1',
+                  'spill_start':'spill_start_1',
+                  'spill_stop':'spill_stop_1',
+                  'hrs':'hours_1',
+                  'unitid':'unit_id_1',
+                  'unitid2':'unit_id_2',
+                  'earz_zone':'edwards_zone',
+                  'expr1029':'expr_1029',
+                  'pipediam':'pipe_diameter',
+                  'pipelen':'pipe_length',
+                  'pipetype':'pipe_type',
+                  'instyear':'installation_year',
+                  'dwndpth':'downstream_depth',
+                  'upsdpth':'upstream_depth',
+                  'rainfall_less3':'rainfall_less_3',
+                  'spill address': 'spill_address_full',
+                  'sewerassetexp':'sewer_asset_exp',
+                  'prevspill_24mos':'previous_spill_24mos',
+                  'unittype':'unit_type',
+                  'assettype':'asset_type',
+                  'lastclnd':'last_cleaned',
+                  'responsetime':'response_time',
+                  'responsedttm':'response_datetime',
+                  'public notice':'public_notice',
+                  'timeint':'time_int',
+                  'hrs_2':'hours_2',
+                  'gal_2':'gallons_2',
+                  'hrs_3':'hours_3',
+                  'gal_3':'gallons_3'
+                  }
 
 
-def fill_with_zeroes(df, *cols):
+def rename_columns_all(df):
     """
-    This functions returns the column names as input and
-    return the dataframe with the
-    null values in those columns replace by 0.
+    takes in selected dataframe and renames columns to intuitive non-capitalized titles
     """
-    for col in cols:
-        df[col] = df[col].fillna(0)
-    return df
-
-
-def fill_with_median(df, *cols):
+    return prepare_core.rename_columns(df, RENAME_COLUMNS)
+def lowercase_and_rename(df):
     """
-    This function fills the NaN values with
-    respective median values.
+    This function changes the column names' case to lowercase
+    and renames the column.
     """
-    for col in cols:
-        df[col] = df[col].fillna(df[col].median())
-    return df
-
+    return rename_columns_all(lowercase_columns(df))
 
-def fill_with_none(df, *cols):
+def spill_street_address(df):
+    return df['spill_address'].astype(str) + ' ' + df['spill_street_name']
+
+
+def canonical_address(df):
+    return addresses.address_ids(spill_street_address(df))
+
+
+def multiple_spills(df):
+    return df['spill_start_2'].notnull()
+
+
+READY_SPEC = {
+    'derive': {'spill_street_address': spill_street_address,
+               'canonical_address': canonical_address,
+               'multiple_spills': multiple_spills,
+               },
+    'drop': ['sso_id',
+             'inspection_key',
+             'service_number',
+             'comments',
+             'ferguson',
+             'expr_1029',
+             'downstream_depth',
+             'upstream_depth',
+             'sewer_asset_exp',
+             'previous_spill_24mos',
+             'spill_address',
+             'spill_street_name',
+             'spill_start_2',
+             'spill_stop_2',
+             'hours_2',
+             'gallons_2',
+             'spill_start_3',
+             'spill_stop_3',
+             'hours_3',
+             'gallons_3',
+             'gallons_1',
+             'spill_address_full',
+             ],
+    'rename': {'spill_start_1': 'spill_start',
+               'spill_stop_1': 'spill_stop',
+               'hours_1': 'hours',
+               },
+    'lowercase': ['unit_type',
+                  'asset_type',
+                  'cause',
+                  'actions',
+                  'watershed',
+                  'discharge_to',
+                  'discharge_route',
+                  'pipe_type',
+                  'root_cause',
+                  ],
+    'titlecase': ['spill_street_address'],
+    'numeric': ['response_time'],
+    'fill': {**dict.fromkeys(['council_district',
+                              'edwards_zone',
+                              'num_spills_24mos',
+                              'time_int',
+                              'gallons_returned',
+                              'hours',
+                              'pipe_diameter',
+                              'pipe_length',
+                              'inches_no',
+                              'rainfall_less_3',
+                              'response_time',
+                              ], 0.0),
+             'installation_year': 9999,
+             **dict.fromkeys(['actions',
+                              'unit_id_1',
+                              'unit_id_2',
+                              'discharge_to',
+                              'discharge_route',
+                              'pipe_type',
+                              'spill_street_address',
+                              'unit_type',
+                              'asset_type',
+                              'root_cause',
+                              'steps_to_prevent',
+                              ], 'na'),
+             },
+    'astype': dict.fromkeys(['council_district',
+                             'edwards_zone',
+                             'num_spills_24mos',
+                             'time_int',
+                             'installation_year',
+                             ], int),
+    'dates': ['report_date',
+              'response_datetime',
+              'last_cleaned',
+              ],
+}
+
+
+@cache.memoize_stage(prepare_core, addresses)
+def clean_df(df):
     """
-    This function fills the NaN values with
-    'None' string value.
+    This function runs READY_SPEC. Its result is cached
+    until the input data or the cleaning code changes.
     """
-    for col in cols:
-        df[col] = df[col].fillna('None')
-    return df
+    return prepare_core.run_spec(df, READY_SPEC)
 
-def fill_with_unknown(df, *cols):
-    """
-    This functions fills the NaN values with
-    'Unknown' string value.
-    """
-    for col in cols:
-        df[col] = df[col].fillna('Unknown')
-    return df
 
-def lowercase_columns(df):
+def ready_df(df, path=None):
     """
-    This function returns a lowercase version of the column values.
+    This function prepares the dataframe for EDA
+    with clean_df(). Pass path to also save
+    the result to a csv file ('data/cleaned_sso_df.csv').
     """
-    df.columns = map(str.lower, df.columns)
+    df = clean_df(df)
+    if path is not None:
+        df.to_csv(path, index=False)
     return df
 
-def lowercase_column_values(df, *columns):
-    """
-    This function returns a lowercase version of the column values.
-    """
-    for col in columns:
-        df[col] = df[col].str.lower() 
-    return df
 
-def titlecase_column_values(df, *columns):
+def prepare(df, use_cache=True):
     """
-    This function returns a titlecase version of the values.
+    This function cleans a raw SSO dataframe from
+    acquire_sso.read_data(): lowercase_and_rename()
+    and clean_df(), without its cache if use_cache is False.
     """
-    for col in columns:
-        df[col] = df[col].str.title() 
-    return df
+    df = lowercase_and_rename(df.copy())
+    return clean_df(df) if use_cache else clean_df.uncached(df)
 
 
-def rename_columns_all(df):
+def gallons_by_address(df):
     """
-    takes in selected dataframe and renames columns to intuitive non-capitalized titles
+    This function returns the spill count, total gallons and
+    most common root cause of every canonical address, most
+    gallons first (data/most_gallons.csv).
     """
-    return df.rename(index=str, columns={'inspkey':'inspection_key',
-                                         'servno':'service_number',
-                                         'reportdate':'report_date',
-                                         'spill_st_name':'spill_street_name',
-                                         'total_gal':'total_gallons',
-                                         'galsret':'gallons_returned',
-                                         'gal':'gallons_1',
-                                         'spill_start':'spill_start_1',
-                                         'spill_stop':'spill_stop_1',
-                                         'hrs':'hours_1',
-                                         'unitid':'unit_id_1',
-                                         'unitid2':'unit_id_2',
-                                         'earz_zone':'edwards_zone',
-                                         'expr1029':'expr_1029',
-                                         'pipediam':'pipe_diameter',
-                                         'pipelen':'pipe_length',
-                                         'pipetype':'pipe_type',
-                                         'instyear':'installation_year',
-                                         'dwndpth':'downstream_depth',
-                                         'upsdpth':'upstream_depth',
-                                         'rainfall_less3':'rainfall_less_3',
-                                         'spill address': 'spill_address_full',
-                                         'sewerassetexp':'sewer_asset_exp',
-                                         'prevspill_24mos':'previous_spill_24mos',
-                                         'unittype':'unit_type',
-                                         'assettype':'asset_type',
-                                         'lastclnd':'last_cleaned',
-                                         'responsetime':'response_time',
-                                         'responsedttm':'response_datetime',
-                                         'public notice':'public_notice',
-                                         'timeint':'time_int',
-                                         'hrs_2':'hours_2',
-                                         'gal_2':'gallons_2',
-                                         'hrs_3':'hours_3',
-                                         'gal_3':'gallons_3'
-                                          })
-def lowercase_and_rename(df):
-    """
-    This function changes the column names' case to lowercase
-    and renames the column.
-    """
-    return rename_columns_all(lowercase_columns(df))
-
-def ready_df(df):
-    """
-    This function prepares the dataframe for EDA.
-    """
-    df = remove_columns(df, columns=[ 'sso_id',
-                                      'inspection_key',
-                                      'service_number',
-                                      'comments',
-                                      'ferguson',
-                                      'expr_1029',
-                                      'downstream_depth',
-                                      'upstream_depth',
-                                      'sewer_asset_exp',
-                                      'previous_spill_24mos',
-                                    ])
-    df['spill_street_address'] = df['spill_address'].map(str)+ ' ' + df['spill_street_name']
-    df = df.drop(columns=['spill_address', 'spill_street_name'])
-    df['multiple_spills'] = np.where(df['spill_start_2'].isnull(), False, True)
-    df = df.drop(columns=['spill_start_2',
-                          'spill_stop_2',
-                          'hours_2',
-                          'gallons_2',
-                          'spill_start_3',
-                          'spill_stop_3',
-                          'hours_3',
-                          'gallons_3',
-                          'gallons_1',
-                          'spill_address_full'
-                          ])
-    df = df.rename(index=str, columns={ "spill_start_1": "spill_start",
-                                        "spill_stop_1": "spill_stop",
-                                        "hours_1": "hours"})
-    df = lowercase_column_values( df, 'unit_type',
-                                'asset_type',
-                                'cause',
-                                'actions',
-                                'watershed',
-                                'discharge_to',
-                                'discharge_route',
-                                'pipe_type',
-                                'root_cause',
-                                )
-    df = titlecase_column_values(df, 'spill_street_address')
-    df[['council_district',
-        'edwards_zone',
-        'num_spills_24mos',
-        'time_int'
-        ]] = df[['council_district',
-                                   'edwards_zone',
-                                   'num_spills_24mos',
-                                   'time_int'
-                                   ]].fillna(0.0).astype(int)
-    df['installation_year'] = df['installation_year'].fillna(9999).astype(int)
-    df[['gallons_returned',
-        'hours',
-        'pipe_diameter',
-        'pipe_length',
-        'inches_no',
-        'rainfall_less_3',
-        'response_time',
-        ]] = df[['gallons_returned',
-                 'hours',
-                 'pipe_diameter',
-                 'pipe_length',
-                 'inches_no',
-                 'rainfall_less_3',
-                 'response_time'
-                 ]].fillna(0.0)
-    df[['actions',
-        'unit_id_1',
-        'unit_id_2',
-        'discharge_to',
-        'discharge_route',
-        'pipe_type',
-        'spill_street_address',
-        'unit_type',
-        'asset_type',
-        'root_cause',
-        'steps_to_prevent',
-      ]] = df[[ 'actions',
-                'unit_id_1',
-                'unit_id_2',
-                'discharge_to',
-                'discharge_route',
-                'pipe_type',
-                'spill_street_address',
-                'unit_type',
-                'asset_type',
-                'root_cause',
-                'steps_to_prevent',
-                ]].fillna('na')
-    df['report_date'] = pd.to_datetime(df['report_date'])
-    df['response_datetime'] = pd.to_datetime(df['response_datetime'])
-    df['last_cleaned'] = pd.to_datetime(df['last_cleaned'])
-
-    df.to_csv('data/cleaned_sso_df.csv', index=False)
-
-    return df
-
+    keys = df['canonical_address'].cat.codes.rename('address_id')
+    grouped = df[['total_gallons']].groupby(keys[keys >= 0])
+    totals = grouped['total_gallons'].agg(total_sso='size', total_gallons='sum')
+    causes = df.groupby([keys, 'root_cause'], observed=True).size().rename('count').reset_index()
+    causes = causes[causes['address_id'] >= 0].sort_values(['address_id', 'count'], ascending=[True, False])
+    totals['primary_root_cause'] = causes.drop_duplicates('address_id').set_index('address_id')['root_cause']
+    totals.insert(0, 'canonical_address', df['canonical_address'].cat.categories[totals.index])
+    return totals.sort_values('total_gallons', ascending=False).reset_index()
 
 
 # ==================================================
@@ -304,9 +247,9 @@ def ready_df(df):
 def clear():
       os.system("cls" if os.name == "nt" else "clear")
 
-def main():
+def main(argv=None):
     """Main entry point for the script."""
-    pass
+    return pipeline.main(argv, dataset='sso')
 
 
 if __name__ == '__main__':
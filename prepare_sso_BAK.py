@@ -22,6 +22,14 @@ import sys
 import pandas as pd
 import numpy as np
 
+import prepare_core
+from prepare_core import (missing_values_row, handle_missing_threshold, count_values,
+                          remove_columns, fill_values, fill_with_zeroes, fill_with_median,
+                          fill_with_none, fill_with_unknown, lowercase_columns,
+                          lowercase_column_values, titlecase_column_values,
+                          parse_dates)
+from prepare_sso import RENAME_COLUMNS
+
 
 
 # ===========
@@ -29,165 +37,19 @@ import numpy as np
 # ===========
 
 
-def missing_values_col(df):
+def missing_values_col(df, sentinels=prepare_core.MISSING_SENTINELS, sample=None, random_state=None):
     """
     This functions returns the total missing values and
     the percent missing values by column.
     """
-    null_count = df.isnull().sum()
-    null_percentage = (null_count / df.shape[0]) * 100
-    empty_count = pd.Series(((df == ' ') | (df == '')).sum())
-    empty_percentage = (empty_count / df.shape[0]) * 100
-    nan_count = pd.Series(((df == 'nan') | (df == 'NaN')).sum())
-    nan_percentage = (nan_count / df.shape[0]) * 100
-    return pd.DataFrame({'num_missing': null_count, 'missing_percentage': null_percentage,
-                         'num_empty': empty_count, 'empty_percentage': empty_percentage,
-                         'nan_count': nan_count, 'nan_percentage': nan_percentage})
-
-
-def missing_values_row(df):
-    """
-    This functions returns the total missing values and
-    the percent missing values by row.
-    """
-    null_count = df.isnull().sum(axis=1)
-    null_percentage = (null_count / df.shape[1]) * 100
-    return pd.DataFrame({'num_missing': null_count, 'percentage': null_percentage})
-
-
-def handle_missing_threshold(df, prop_required_column = .3, prop_required_row = .9):
-    """
-    This functions removes columns and rows whose
-    count of missing values exceeds threshold.
-    """
-    threshold = int(round(prop_required_column*len(df.index),0))
-    df.dropna(axis=1, thresh=threshold, inplace=True)
-    threshold = int(round(prop_required_row*len(df.columns),0))
-    df.dropna(axis=0, thresh=threshold, inplace=True)
-    return df
-
-
-def count_values(df):
-    """
-    This function counts the value of columns in a dataframe.
-    """
-    for col in df.columns:
-        n = df[col].unique().shape[0]
-        col_bins = min(n, 10)
-        print(f"{col}:")
-        if df[col].dtype in ['int64', 'float64'] and n > 10:
-            print(df[col].value_counts(bins=col_bins, sort=False))
-        else:
-            print(df[col].value_counts())
-        print("\n")
-
-def remove_columns(df, columns):
-    return df.drop(columns=columns)
-
-
-def fill_with_zeroes(df, *cols):
-    """
-    This functions returns the column names as input and
-    return the dataframe with the
-    null values in those columns replace by 0.
-    """
-    for col in cols:
-        df[col] = df[col].fillna(0)
-    return df
-
-
-def fill_with_median(df, *cols):
-    """
-    This function fills the NaN values with
-    respective median values.
-    """
-    for col in cols:
-        df[col] = df[col].fillna(df[col].median())
-    return df
-
-
-def fill_with_none(df, *cols):
-    """
-    This function fills the NaN values with
-    'None' string value.
-    """
-    for col in cols:
-        df[col] = df[col].fillna('None')
-    return df
-
-def fill_with_unknown(df, *cols):
-    """
-    This functions fills the NaN values with
-    'Unknown' string value.
-    """
-    for col in cols:
-        df[col] = df[col].fillna('Unknown')
-    return df
-
-def lowercase_columns(df):
-    """
-    This function returns a lowercase version of the column values.
-    """
-    df.columns = map(str.lower, df.columns)
-    return df
-
-def lowercase_column_values(df, *columns):
-    """
-    This function returns a lowercase version of the column values.
-    """
-    for col in columns:
-        df[col] = df[col].str.lower() 
-    return df
-
-def titlecase_column_values(df, *columns):
-    """
-    This function returns a titlecase version of the values.
-    """
-    for col in columns:
-        df[col] = df[col].str.title() 
-    return df
+    return prepare_core.missing_values_col(df, sentinels, sample=sample, random_state=random_state)
 
 
 def rename_columns_all(df):
     """
     takes in selected dataframe and renames columns to intuitive non-capitalized titles
     """
-    return df.rename(index=str, columns={'inspkey':'inspection_key',
-                                         'servno':'service_number',
-                                         'reportdate':'report_date',
-                                         'spill_st_name':'spill_street_name',
-                                         'total_gal':'total_gallons',
-                                         'galsret':'gallons_returned',
-                                         'gal':'gallons_1',
-                                         'spill_start':'spill_start_1',
-                                         'spill_stop':'spill_stop_1',
-                                         'hrs':'hours_1',
-                                         'unitid':'unit_id_1',
-                                         'unitid2':'unit_id_2',
-                                         'earz_zone':'edwards_zone',
-                                         'expr1029':'expr_1029',
-                                         'pipediam':'pipe_diameter',
-                                         'pipelen':'pipe_length',
-                                         'pipetype':'pipe_type',
-                                         'instyear':'installation_year',
-                                         'dwndpth':'downstream_depth',
-                                         'upsdpth':'upstream_depth',
-                                         'rainfall_less3':'rainfall_less_3',
-                                         'spill address': 'spill_address_full',
-                                         'sewerassetexp':'sewer_asset_exp',
-                                         'prevspill_24mos':'previous_spill_24mos',
-                                         'unittype':'unit_type',
-                                         'assettype':'asset_type',
-                                         'lastclnd':'last_cleaned',
-                                         'responsetime':'response_time',
-                                         'responsedttm':'response_datetime',
-                                         'public notice':'public_notice',
-                                         'timeint':'time_int',
-                                         'hrs_2':'hours_2',
-                                         'gal_2':'gallons_2',
-                                         'hrs_3':'hours_3',
-                                         'gal_3':'gallons_3'
-                                          })
+    return prepare_core.rename_columns(df, RENAME_COLUMNS)
 def lowercase_and_rename(df):
     """
     This function changes the column names' case to lowercase
@@ -263,29 +125,18 @@ def ready_df1(df):
                  'rainfall_less_3',
                  'response_time'
                  ]].fillna(0.0)
-    df[['actions',
-        'unit_id_1',
-        'unit_id_2',
-        'discharge_to',
-        'discharge_route',
-        'pipe_type',
-        'spill_street_address',
-        'unit_type',
-        'asset_type',
-        'root_cause',
-        'steps_to_prevent',
-      ]] = df[[ 'actions',
-                'unit_id_1',
-                'unit_id_2',
-                'discharge_to',
-                'discharge_route',
-                'pipe_type',
-                'spill_street_address',
-                'unit_type',
-                'asset_type',
-                'root_cause',
-                'steps_to_prevent',
-                ]].fillna('na')
+    df = fill_values(df, dict.fromkeys(['actions',
+                                        'unit_id_1',
+                                        'unit_id_2',
+                                        'discharge_to',
+                                        'discharge_route',
+                                        'pipe_type',
+                                        'spill_street_address',
+                                        'unit_type',
+                                        'asset_type',
+                                        'root_cause',
+                                        'steps_to_prevent',
+                                        ], 'na'))
     df['report_date'] = pd.to_datetime(df['report_date'])
     df['response_datetime'] = pd.to_datetime(df['response_datetime'])
     df['last_cleaned'] = pd.to_datetime(df['last_cleaned'])
@@ -1,19 +1,44 @@
 import warnings
 warnings.filterwarnings("ignore")
 
+import importlib
+
 import numpy as np
 import pandas as pd
 
-import matplotlib.pyplot as plt
-import matplotlib
-import seaborn as sns
+### matplotlib, seaborn, scipy and sklearn take seconds to import, so they are only
+### imported when one of these names is first used (proof_of_concept_helpers.plt, ...)
+LAZY_IMPORTS = {
+    'plt': ('matplotlib.pyplot', None),
+    'matplotlib': ('matplotlib', None),
+    'sns': ('seaborn', None),
+    'pearsonr': ('scipy.stats', 'pearsonr'),
+    'train_test_split': ('sklearn.model_selection', 'train_test_split'),
+    'PolynomialFeatures': ('sklearn.preprocessing', 'PolynomialFeatures'),
+    'LinearRegression': ('sklearn.linear_model', 'LinearRegression'),
+    'mean_squared_error': ('sklearn.metrics', 'mean_squared_error'),
+    'r2_score': ('sklearn.metrics', 'r2_score'),
+    'mean_absolute_error': ('sklearn.metrics', 'mean_absolute_error'),
+    'median_absolute_error': ('sklearn.metrics', 'median_absolute_error'),
+}
+
+def __getattr__(name):
+
+    '''
+    Import a LAZY_IMPORTS name on first use (PEP 562) and keep it as a module global.
+    '''
 
-from scipy.stats import pearsonr
+    if name not in LAZY_IMPORTS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    module, attr = LAZY_IMPORTS[name]
+    value = importlib.import_module(module)
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
 
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error, median_absolute_error
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_IMPORTS))
 
 def create_pipe_data(num_days):
 
@@ -21,19 +46,17 @@ def create_pipe_data(num_days):
     Let's create data that replicates the history of flow of water through a pipe.
     '''
 
-    pipe = pd.DataFrame(np.random.randint(19,101,size=(num_days, 1)), columns=['percent_flow'])
-    pipe = pipe.sort_values(by=['percent_flow'], ascending=False)
-    pipe.reset_index(drop=True, inplace=True)
-
-    pipe_days = pd.Series(range(1,(num_days + 1)))
-    pipe_days = pd.DataFrame(pipe_days, columns=['days'])
-
-    pipe_df = pipe.merge(pipe_days, left_index=True, right_index=True)
+    flow = np.sort(np.random.randint(19, 101, size=num_days))[::-1]
+    pipe_df = pd.DataFrame({'percent_flow': flow, 'days': np.arange(1, num_days + 1)})
 
     return pipe_df
 
 def poly_regression(pipe_name, train_size):
 
+    from sklearn.preprocessing import PolynomialFeatures
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_squared_error, r2_score
+
     train = pipe_name[:int(pipe_name.shape[0] * train_size)]
     test = pipe_name[int(pipe_name.shape[0] * train_size):]
 
@@ -78,4 +101,201 @@ def poly_regression(pipe_name, train_size):
     clean_day = clean_day.merge(pipe_days_pred, left_index=True, right_index=True)
     # clean_day = pipe_days_pred[pipe_days_pred.percent_flow <= 20][:1]
 
-    print(clean_day)
\ No newline at end of file
+    print(clean_day)
+
+def stack_pipes(pipes):
+
+    '''
+    Stack a dict of {pipe name: create_pipe_data() frame} into one long frame
+    with a pipe column. A frame that already has a pipe column is returned as is.
+    '''
+
+    if isinstance(pipes, pd.DataFrame):
+        return pipes
+    frames = [frame.assign(pipe=name) for name, frame in pipes.items()]
+    return pd.concat(frames, ignore_index=True)
+
+def poly_regression_batch(pipes, train_size, threshold=20):
+
+    '''
+    Fit the degree 2 curve of poly_regression to every pipe at once.
+
+    pipes is a long frame with pipe, days and percent_flow columns (or a dict of
+    pipe frames). Each pipe is split on its first train_size share of days and all
+    the curves are fitted together: the sums of the normal equations of every pipe
+    are gathered with np.bincount and the 3x3 systems are solved in one batched
+    np.linalg.solve call. Returns one row per pipe with the coefficients, the
+    train/test RMSE and R2, the last observed day and clean_day, the first day after
+    the training days whose predicted percent_flow is at or below threshold (NaN if
+    the curve never gets there), see clean_days.
+    '''
+
+    pipes = stack_pipes(pipes).sort_values(['pipe', 'days'], kind='stable')
+    codes, names = pd.factorize(pipes['pipe'])
+    n_pipes = len(names)
+    days = pipes['days'].to_numpy(dtype='float64')
+    flow = pipes['percent_flow'].to_numpy(dtype='float64')
+
+    ### position of every row within its pipe, to split each pipe on its own days
+    sizes = np.bincount(codes, minlength=n_pipes)
+    first_row = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    position = np.arange(len(codes)) - first_row[codes]
+    train = position < (sizes * train_size).astype('int64')[codes]
+
+    ### scale the days of every pipe to [0, 1] to keep the normal equations well conditioned
+    scale = np.maximum.reduceat(np.where(train, np.abs(days), 0), first_row) if len(codes) else np.ones(0)
+    scale = np.where(scale > 0, scale, 1)
+    x = days / scale[codes]
+
+    ### normal equations X'X b = X'y for X = [1, x, x^2], summed per pipe
+    w = train.astype('float64')
+    power_sums = np.stack([np.bincount(codes, weights=w * x ** k, minlength=n_pipes) for k in range(5)], axis=1)
+    moments = np.stack([np.bincount(codes, weights=w * x ** k * flow, minlength=n_pipes) for k in range(3)], axis=1)
+    xtx = power_sums[:, [[0, 1, 2], [1, 2, 3], [2, 3, 4]]]
+    solvable = np.linalg.matrix_rank(xtx) == 3
+    beta = np.full((n_pipes, 3), np.nan)
+    if solvable.any():
+        beta[solvable] = np.linalg.solve(xtx[solvable], moments[solvable][:, :, None])[:, :, 0]
+
+    predicted = beta[codes, 0] + beta[codes, 1] * x + beta[codes, 2] * x ** 2
+
+    def scores(rows):
+        n = np.bincount(codes, weights=rows, minlength=n_pipes)
+        mean = np.bincount(codes, weights=rows * flow, minlength=n_pipes) / np.where(n > 0, n, np.nan)
+        sse = np.bincount(codes, weights=rows * (flow - predicted) ** 2, minlength=n_pipes)
+        sst = np.bincount(codes, weights=rows * (flow - mean[codes]) ** 2, minlength=n_pipes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return n, np.sqrt(sse / n), np.where(sst > 0, 1 - sse / sst, np.nan)
+
+    n_train, rmse_train, r2_train = scores(w)
+    n_test, rmse_test, r2_test = scores(1 - w)
+
+    coef_days, coef_days2 = beta[:, 1] / scale, beta[:, 2] / scale ** 2
+    last_day = np.maximum.reduceat(days, first_row) if len(codes) else np.zeros(0)
+    clean_day = clean_days(beta[:, 0], coef_days, coef_days2, threshold, start=scale)
+
+    return pd.DataFrame({'pipe': names,
+                         'n_train': n_train.astype('int64'),
+                         'n_test': n_test.astype('int64'),
+                         'intercept': beta[:, 0],
+                         'coef_days': coef_days,
+                         'coef_days2': coef_days2,
+                         'rmse_train': rmse_train,
+                         'r2_train': r2_train,
+                         'rmse_test': rmse_test,
+                         'r2_test': r2_test,
+                         'last_day': last_day,
+                         'clean_day': clean_day})
+
+def clean_days(intercept, coef_days, coef_days2, threshold=20, start=0):
+
+    '''
+    Solve for the first whole day at or after start on which the fitted curve
+    intercept + coef_days * day + coef_days2 * day^2 is at or below threshold, for
+    arrays of coefficients at once (NaN where the curve never gets there).
+
+    This replaces scanning the predicted frames (the commented out
+    pipe_days_pred[pipe_days_pred.percent_flow <= 20][:1]) with the quadratic
+    formula: the answer is start if the curve is already below threshold, else the
+    earliest root after start where the curve is going down.
+    '''
+
+    a, b, c = (np.asarray(v, dtype='float64') for v in (intercept, coef_days, coef_days2))
+    start = np.broadcast_to(np.asarray(start, dtype='float64'), np.broadcast(a, b, c).shape)
+    a, b, c = np.broadcast_arrays(a - threshold, b, c)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ### numerically stable roots of c x^2 + b x + a = 0, with the linear case where c is 0
+        root = np.sqrt(b ** 2 - 4 * a * c)
+        q = -0.5 * (b + np.where(b >= 0, 1, -1) * root)
+        roots = np.stack([np.where(c != 0, q / c, -a / b), np.where(c != 0, a / q, np.nan)])
+
+    slope = b + 2 * c * roots
+    crossing = np.isfinite(roots) & (roots >= start) & (slope <= 0)
+    day = np.nanmin(np.where(crossing, roots, np.inf), axis=0)
+    day = np.where(a + b * start + c * start ** 2 <= 0, start, day)
+    return np.where(np.isfinite(day), np.ceil(day), np.nan)
+
+def maintenance_schedule(fits, threshold=20, today=None):
+
+    '''
+    Rank the pipes of a poly_regression_batch result by how soon their predicted
+    percent_flow reaches threshold after their last observed day. Pipes that are
+    already there come first (days_left 0, lowest predicted percent_flow first),
+    pipes that never get there last. With
+    today (a date for the last observed day) a clean_date column is added.
+    '''
+
+    last_day = fits['last_day'].to_numpy()
+    clean_day = clean_days(fits['intercept'], fits['coef_days'], fits['coef_days2'], threshold,
+                           start=last_day)
+    schedule = pd.DataFrame({'pipe': fits['pipe'].to_numpy(),
+                             'last_day': last_day,
+                             'percent_flow_pred': (fits['intercept'] + fits['coef_days'] * last_day
+                                                   + fits['coef_days2'] * last_day ** 2).to_numpy(),
+                             'clean_day': clean_day,
+                             'days_left': clean_day - last_day})
+    if today is not None:
+        schedule['clean_date'] = pd.Timestamp(today) + pd.to_timedelta(schedule['days_left'], unit='D')
+    schedule = schedule.sort_values(['days_left', 'percent_flow_pred'], na_position='last', kind='stable')
+    schedule['urgency'] = np.arange(1, len(schedule) + 1)
+    return schedule.reset_index(drop=True)
+
+DECAY_CURVES = {
+    'linear': lambda u: u,
+    'convex': lambda u: 1 - (1 - u) ** 2,
+    'exponential': lambda u: (1 - np.exp(-4 * u)) / (1 - np.exp(-4)),
+}
+
+def generate_pipe_flows(num_pipes, num_days, decay='convex', start=(95, 100), end=(10, 40), noise=2.0,
+                        seed=None, dtype='float32'):
+
+    '''
+    Create the flow history of num_pipes pipes over num_days days as one contiguous
+    (num_pipes, num_days) array of percent_flow.
+
+    Every pipe starts at a percent_flow drawn from the start range and decays to one
+    drawn from the end range along a decay curve (linear, convex or exponential, or a
+    function of the day fraction in [0, 1]), plus gaussian noise with a standard
+    deviation of noise, clipped to [0, 100]. The same seed gives the same data.
+    '''
+
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    curve = DECAY_CURVES[decay] if isinstance(decay, str) else decay
+
+    first = rng.uniform(*start, size=(num_pipes, 1))
+    last = rng.uniform(*end, size=(num_pipes, 1))
+    shape = curve(np.linspace(0, 1, num_days))[None, :]
+    flows = first - (first - last) * shape
+    flows += rng.normal(0, noise, size=flows.shape)
+    return np.clip(flows, 0, 100, out=flows).astype(dtype, copy=False)
+
+def pipe_flow_frame(flows, first_pipe=0):
+
+    '''
+    Turn a generate_pipe_flows() array into the long pipe, days, percent_flow frame
+    used by poly_regression_batch.
+    '''
+
+    num_pipes, num_days = flows.shape
+    return pd.DataFrame({'pipe': np.repeat(np.arange(first_pipe, first_pipe + num_pipes), num_days),
+                         'days': np.tile(np.arange(1, num_days + 1), num_pipes),
+                         'percent_flow': flows.ravel()})
+
+def write_pipe_flows(path, num_pipes, num_days, chunk_pipes=10000, seed=None, **kwargs):
+
+    '''
+    Stream a network-scale synthetic flow history to a .npy file chunk_pipes pipes at
+    a time, so it never has to fit in memory. Open it with np.load(path, mmap_mode='r').
+    Chunk i is generated from the seed sequence (seed, i), so the same seed and
+    chunk_pipes give the same file.
+    '''
+
+    flows = np.lib.format.open_memmap(path, mode='w+', dtype=kwargs.get('dtype', 'float32'),
+                                      shape=(num_pipes, num_days))
+    for i, first in enumerate(range(0, num_pipes, chunk_pipes)):
+        rng = np.random.default_rng(None if seed is None else [seed, i])
+        count = min(chunk_pipes, num_pipes - first)
+        flows[first:first + count] = generate_pipe_flows(count, num_days, seed=rng, **kwargs)
+    flows.flush()
+    return flows
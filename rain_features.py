@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. master-sso.ipynb
+2.
+3.
+
+It recomputes the antecedent rainfall of every spill (what the
+inches_no and rainfall_less_3 columns carry) from the SARA five
+minute readings at the gauges nearest to the spill.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+
+import pandas as pd
+import numpy as np
+
+import spatial
+from rainfall import RainfallIndex
+
+
+
+# ========
+# FEATURES
+# ========
+
+
+WINDOWS = {'1h': '1h', '24h': '24h', '3d': '3D', '7d': '7D'}
+
+SPILL_START_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+
+
+def spill_times(spills, time='spill_start'):
+    """
+    This function returns the start of every spill as datetimes.
+    """
+    times = spills[time]
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return times
+    parsed = pd.to_datetime(times, format=SPILL_START_FORMAT, errors='coerce')
+    retry = parsed.isna() & times.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(times[retry], errors='coerce')
+    return parsed
+
+
+def antecedent_rainfall(spills, details, gauges=None, windows=WINDOWS, k=3,
+                        lat='lat', lon='long', time='spill_start', index=None):
+    """
+    This function returns a copy of spills with the rain that
+    fell over each window before the spill started:
+
+    rain_<window>      at the nearest gauge with readings then
+    rain_<window>_idw  inverse-distance weighted over the k
+                       nearest gauges with readings then
+
+    Every (spill, gauge, window) total comes from the prefix
+    sums of a RainfallIndex, so no frame is filtered per spill.
+    Pass index (a RainfallIndex) to reuse one across calls.
+    """
+    if gauges is None:
+        gauges = spatial.gauge_locations(details)
+    if index is None:
+        index = RainfallIndex.from_details(details)
+    spills = spatial.nearest_gauges(spills, gauges, k=k, lat=lat, lon=lon)
+    k = min(k, len(gauges))
+
+    t1 = spill_times(spills, time).to_numpy()
+    names = np.column_stack([spills['gauge_{}'.format(i + 1)].to_numpy(dtype=object)
+                             for i in range(k)])
+    km = np.column_stack([spills['gauge_{}_km'.format(i + 1)].to_numpy(dtype='float64')
+                          for i in range(k)])
+    weights = 1.0 / np.maximum(km, 0.1)
+
+    features = {}
+    for label, window in windows.items():
+        t0 = t1 - pd.Timedelta(window).to_timedelta64()
+        totals = index.window_totals(names.ravel(), np.repeat(t0, k), np.repeat(t1, k))
+        totals = totals.reshape(len(spills), k)
+
+        has_data = ~np.isnan(totals)
+        nearest = np.argmax(has_data, axis=1)
+        features['rain_' + label] = np.where(has_data.any(axis=1),
+                                             totals[np.arange(len(spills)), nearest], np.nan)
+        w = np.where(has_data, weights, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            features['rain_{}_idw'.format(label)] = np.nansum(totals * w, axis=1) / w.sum(axis=1)
+    return spills.assign(**features)
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
@@ -0,0 +1,463 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. dd-sara.ipynb
+2.
+3.
+
+It keeps running rainfall totals for every SARA gauge so that
+a new rainfall detail drop only updates the days it touches.
+Readings that were already added are skipped, so running this
+again on the same file leaves the totals as they are:
+
+    aggregator = rainfall.RainfallAggregator.load('data/rainfall')
+    for chunk in acquire_sara.stream_data('sara-rainfall-details.csv'):
+        aggregator.update(chunk)
+    aggregator.save('data/rainfall')
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+import glob
+import json
+
+import pandas as pd
+import numpy as np
+
+
+
+# ===========
+# AGGREGATION
+# ===========
+
+
+WINDOWS = {'rain_24h': '24h', 'rain_72h': '72h'}
+
+REACH = max(pd.Timedelta(window) for window in WINDOWS.values())
+
+
+def period_keys(times, period):
+    """
+    This function returns the hour, day, week (starting
+    monday) or month of every time.
+    """
+    if period == 'hour':
+        key = times.dt.floor('h')
+    elif period == 'date':
+        key = times.dt.normalize()
+    elif period == 'week':
+        key = times.dt.normalize() - pd.to_timedelta(times.dt.dayofweek, unit='D')
+    elif period == 'month':
+        key = times.dt.to_period('M').dt.to_timestamp()
+    else:
+        raise ValueError('unknown period: {}'.format(period))
+    return key.rename(period)
+
+
+def period_totals(details, period):
+    """
+    This function sums the five minute readings by hour,
+    day, week or month and gauge, indexed by (period,
+    location_name) so that later readings sort last.
+    """
+    key = period_keys(details['date_time'], period)
+    location = details['location_name'].astype(str)
+    totals = details['five_minute_rainfall'].groupby([key, location]).sum()
+    return totals.rename('rainfall')
+
+
+def slot_bits(times):
+    """
+    This function returns the bit of the five minute slot of
+    every time within its hour (12 slots, so 16 bits).
+    """
+    return pd.Series(np.left_shift(1, times.dt.minute.to_numpy() // 5).astype('uint16'),
+                     index=times.index, name='slots')
+
+
+def block_labels(index):
+    """
+    This function returns the month block of every row of a
+    (period, location_name) index.
+    """
+    return index.get_level_values(0).to_period('M').to_timestamp()
+
+
+def merge_block(stored, new):
+    """
+    This function adds the totals of a frame to those of a
+    stored block and ORs the slots of the readings together.
+    Rows that are new to the block get NaN accumulations.
+    """
+    if stored is None:
+        return new.sort_index()
+    index = stored.index.union(new.index)
+    merged = stored.reindex(index)
+    merged['rainfall'] = merged['rainfall'].fillna(0) + new['rainfall'].reindex(index, fill_value=0)
+    if 'slots' in new:
+        merged['slots'] = (merged['slots'].fillna(0).astype('uint16')
+                           | new['slots'].reindex(index, fill_value=0).astype('uint16'))
+    return merged
+
+
+class RainfallAggregator:
+    """
+    This class keeps hourly, daily, weekly and monthly rainfall
+    totals and the trailing 24h/72h accumulations per gauge.
+
+    The totals are kept in blocks of one month, indexed by
+    (period, location_name). Totals are additive, so update()
+    adds the sums of the new readings to the blocks they fall
+    in and recomputes the rolling accumulations only from the
+    first new hour of each gauge until 72 hours after its last,
+    so an update costs the months it touches, not the history.
+
+    The hourly blocks also record which five minute slots of
+    every gauge hour were ingested; readings of a slot that was
+    already ingested are skipped, so feeding the same file
+    again does not count its rain twice.
+    """
+
+    periods = ['hour', 'date', 'week', 'month']
+
+    def __init__(self):
+        self.blocks = {period: {} for period in self.periods}
+        self.dirty = set()
+
+    def update(self, details):
+        """
+        This method adds a frame of five minute readings
+        (location_name, date_time, five_minute_rainfall) and
+        returns the gauge days it changed.
+        """
+        details = details.dropna(subset=['location_name', 'date_time', 'five_minute_rainfall'])
+        if not pd.api.types.is_datetime64_any_dtype(details['date_time']):
+            details = details.assign(date_time=pd.to_datetime(details['date_time']))
+        details = self.unseen(details)
+
+        for period in self.periods:
+            new = period_totals(details, period).to_frame()
+            if period == 'hour':
+                slots = slot_bits(details['date_time']).groupby(
+                    [period_keys(details['date_time'], 'hour'), details['location_name'].astype(str)]).sum()
+                new['slots'] = slots.astype('uint16')
+            for month, part in new.groupby(block_labels(new.index)):
+                self.blocks[period][month] = merge_block(self.blocks[period].get(month), part)
+                self.dirty.add((period, month))
+
+        hours = period_keys(details['date_time'], 'hour')
+        affected = hours.groupby(details['location_name'].astype(str)).agg(['min', 'max'])
+        self.update_rolling(affected)
+        days = period_totals(details, 'date').index.to_frame(index=False)
+        return days[['location_name', 'date']].sort_values(['location_name', 'date'], ignore_index=True)
+
+    def unseen(self, details):
+        """
+        This method returns the readings whose gauge and five
+        minute slot were not ingested yet, once each, so the
+        slot bits of a gauge hour can be summed instead of ORed.
+        """
+        hours = period_keys(details['date_time'], 'hour')
+        location = details['location_name'].astype(str)
+        bits = slot_bits(details['date_time']).to_numpy()
+        keys = pd.MultiIndex.from_arrays([hours, location])
+        fresh = ~pd.DataFrame({'hour': hours, 'location': location, 'bits': bits}).duplicated().to_numpy()
+
+        stored = np.zeros(len(details), dtype='uint16')
+        months = block_labels(keys)
+        for month in months.unique():
+            block = self.blocks['hour'].get(month)
+            if block is not None:
+                rows = np.flatnonzero(months == month)
+                stored[rows] = block['slots'].reindex(keys[rows]).fillna(0).to_numpy(dtype='uint16')
+        return details[fresh & (stored & bits == 0)]
+
+    def update_rolling(self, affected):
+        """
+        This method recomputes the rolling accumulations from the
+        first new hour of each affected gauge until 72 hours after
+        its last new hour, which is as far as the new readings reach.
+        Only the month blocks in that span are read.
+        """
+        if not len(affected):
+            return
+        start, stop = affected['min'].min() - REACH, affected['max'].max() + REACH
+        months = [month for month in sorted(self.blocks['hour'])
+                  if start.to_period('M').to_timestamp() <= month <= stop]
+        hourly = pd.concat([self.blocks['hour'][month]['rainfall'] for month in months]).reset_index()
+
+        bounds = affected.reindex(hourly['location_name'])
+        hours = hourly['hour'].to_numpy()
+        near = (hours > bounds['min'].to_numpy() - REACH) & (hours <= bounds['max'].to_numpy() + REACH)
+        hourly = hourly[near].sort_values(['location_name', 'hour'])
+        grouped = hourly.set_index('hour').groupby('location_name')['rainfall']
+        recomputed = pd.DataFrame({name: grouped.rolling(window).sum() for name, window in WINDOWS.items()})
+        recomputed = recomputed.reset_index()
+        first = affected['min'].reindex(recomputed['location_name']).to_numpy()
+        recomputed = recomputed[recomputed['hour'].to_numpy() >= first].set_index(['hour', 'location_name'])
+
+        for month, part in recomputed.groupby(block_labels(recomputed.index)):
+            block = self.blocks['hour'][month]
+            rows = block.index.get_indexer(part.index)
+            for name in WINDOWS:
+                if name not in block:
+                    block[name] = np.nan
+                block.iloc[rows, block.columns.get_loc(name)] = part[name].to_numpy()
+            self.dirty.add(('hour', month))
+
+    def totals(self, period, columns=('rainfall',)):
+        """
+        This method returns the columns of a period's blocks as
+        one frame sorted by location_name and period.
+        """
+        columns = list(columns)
+        blocks = self.blocks[period]
+        if not blocks:
+            return pd.DataFrame({'location_name': pd.Series(dtype=object),
+                                 period: pd.Series(dtype='datetime64[ns]'),
+                                 **{col: pd.Series(dtype='float64') for col in columns}})
+        frame = pd.concat([blocks[month][columns] for month in sorted(blocks)]).reset_index()
+        frame = frame.sort_values(['location_name', period], ignore_index=True)
+        return frame[['location_name', period] + columns]
+
+    def hourly_totals(self):
+        return self.totals('hour')
+
+    def daily_totals(self):
+        return self.totals('date')
+
+    def weekly_totals(self):
+        return self.totals('week')
+
+    def monthly_totals(self):
+        return self.totals('month')
+
+    def rolling_totals(self):
+        return self.totals('hour', WINDOWS)
+
+    def save(self, directory):
+        """
+        This method writes the blocks changed since the last
+        save to <directory>/<period>/<YYYY-MM>.parquet.
+        """
+        for period, month in sorted(self.dirty):
+            target = os.path.join(directory, period, month.strftime('%Y-%m') + '.parquet')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            self.blocks[period][month].to_parquet(target + '.tmp')
+            os.replace(target + '.tmp', target)
+        self.dirty = set()
+
+    @classmethod
+    def load(cls, directory):
+        """
+        This method reads the blocks written by save(), or
+        returns an empty aggregator when there are none yet.
+        """
+        aggregator = cls()
+        for period in cls.periods:
+            for target in sorted(glob.glob(os.path.join(directory, period, '*.parquet'))):
+                month = pd.Timestamp(os.path.basename(target)[:-len('.parquet')])
+                aggregator.blocks[period][month] = pd.read_parquet(target)
+        return aggregator
+
+
+
+# =====
+# INDEX
+# =====
+
+
+SCALE = 100
+
+
+class RainfallIndex:
+    """
+    This class answers "how much rain fell at gauge g between
+    t0 and t1" from the five minute readings. The readings are
+    sorted by gauge and time and summed into a prefix sum, so
+    a window total is two binary searches and a subtraction,
+    and many windows are answered with one vectorized search.
+
+    Readings are keyed by gauge code * span + seconds since the
+    first reading, which keeps every gauge in its own segment
+    of one sorted array. The prefix sum is kept in integer units
+    of 1 / scale inch (hundredths, the precision of the gauges),
+    so window totals come out exact instead of with float noise.
+    """
+
+    def __init__(self, gauges, keys, prefix, first, last, origin, span, scale=SCALE):
+        self.gauges = pd.Index(gauges, name='location_name')
+        self.keys = keys
+        self.prefix = prefix
+        self.first = first
+        self.last = last
+        self.origin = origin
+        self.span = span
+        self.scale = scale
+
+    @classmethod
+    def from_details(cls, details):
+        """
+        This method builds the index from a frame of five minute
+        readings (location_name, date_time, five_minute_rainfall).
+        """
+        details = details.dropna(subset=['location_name', 'date_time', 'five_minute_rainfall'])
+        codes, gauges = pd.factorize(details['location_name'].astype(str), sort=True)
+        seconds, _ = to_seconds(details['date_time'])
+        origin = int(seconds.min()) if len(seconds) else 0
+        seconds = seconds - origin
+        span = int(seconds.max()) + 2 if len(seconds) else 2
+
+        keys = codes.astype('int64') * span + seconds
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        values = details['five_minute_rainfall'].to_numpy(dtype='float64')[order]
+        units = np.rint(values * SCALE).astype('int64')
+        prefix = np.concatenate([[0], np.cumsum(units)])
+
+        bounds = np.searchsorted(keys, np.arange(len(gauges) + 1) * span)
+        first = np.where(bounds[1:] > bounds[:-1], keys[np.minimum(bounds[:-1], len(keys) - 1)], -1)
+        last = np.where(bounds[1:] > bounds[:-1], keys[np.maximum(bounds[1:] - 1, 0)], -1)
+        gauge_base = np.arange(len(gauges)) * span
+        return cls(gauges, keys, prefix, first - gauge_base, last - gauge_base, origin, span)
+
+    arrays = ['keys', 'prefix', 'first', 'last']
+
+    def save(self, directory):
+        """
+        This method writes the index to .npy files plus a
+        meta.json with the gauge names, origin, span and scale.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in self.arrays:
+            target = os.path.join(directory, name + '.npy')
+            with open(target + '.tmp', 'wb') as f:
+                np.save(f, np.asarray(getattr(self, name)))
+            os.replace(target + '.tmp', target)
+        meta = {'gauges': [str(gauge) for gauge in self.gauges],
+                'origin': int(self.origin),
+                'span': int(self.span),
+                'scale': self.scale}
+        target = os.path.join(directory, 'meta.json')
+        with open(target + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(target + '.tmp', target)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        This method reads an index written by save(). With mmap
+        the arrays are memory-mapped instead of read, so opening
+        the index is instant and only the pages a query touches
+        are loaded.
+        """
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r' if mmap else None)
+                  for name in cls.arrays}
+        return cls(meta['gauges'], arrays['keys'], arrays['prefix'], arrays['first'], arrays['last'],
+                   meta['origin'], meta['span'], meta.get('scale', 1))
+
+    @classmethod
+    def build(cls, details, directory):
+        """
+        This method builds the index once for an ingest
+        and saves it to directory.
+        """
+        index = cls.from_details(details)
+        index.save(directory)
+        return index
+
+    def window_total(self, gauge, t0, t1, covered=True):
+        """
+        This method returns the rain that fell at one gauge
+        after t0 and up to t1.
+        """
+        return float(self.window_totals([gauge], t0, t1, covered=covered)[0])
+
+    def window_totals(self, gauges, t0, t1, covered=True):
+        """
+        This method returns the rain that fell at each gauge
+        after t0 and up to t1 (readings in (t0, t1]) for arrays
+        of gauge names and times, e.g. for many
+        (gauge, t0, t1) tuples at once:
+
+            index.window_totals(frame['gauge'], frame['t0'], frame['t1'])
+
+        Unknown gauges, and with covered windows outside a
+        gauge's first and last reading, give NaN.
+        """
+        codes = self.gauges.get_indexer(pd.Index(np.asarray(gauges, dtype=object)))
+        start, no_start = to_seconds(t0)
+        stop, no_stop = to_seconds(t1)
+        start = start - self.origin
+        stop = stop - self.origin
+        known = (codes >= 0) & ~no_start & ~no_stop
+        safe = np.where(known, codes, 0).astype('int64')
+
+        lo = np.searchsorted(self.keys, safe * self.span + np.clip(start, -1, self.span - 1), side='right')
+        hi = np.searchsorted(self.keys, safe * self.span + np.clip(stop, -1, self.span - 1), side='right')
+        totals = (self.prefix[hi] - self.prefix[lo]) / self.scale
+
+        valid = known
+        if covered:
+            valid = valid & (stop >= self.first[safe]) & (start <= self.last[safe])
+        return np.where(valid, totals, np.nan)
+
+
+def to_seconds(times):
+    """
+    This function converts a datetime, or an array of them, to
+    int64 seconds since the epoch. It also returns a mask of
+    the NaT values, which are set to 0.
+    """
+    if not isinstance(times, pd.Series):
+        times = pd.Series(np.atleast_1d(np.asarray(times)))
+    times = pd.to_datetime(times)
+    missing = times.isna().to_numpy()
+    seconds = times.to_numpy(dtype='datetime64[s]').astype('int64')
+    return np.where(missing, 0, seconds), missing
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. master-sso.ipynb
+2.
+3.
+
+It counts, for every spill, the earlier spills at the same
+asset, at the same address or nearby within a trailing window,
+so NUM_SPILLS_COMPKEY / NUM_SPILLS_24MOS style features can be
+recomputed whenever new months of spills arrive:
+
+    spills = repeat_spills.repeat_spills(spills, window='730D', radius=100)
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+
+import pandas as pd
+import numpy as np
+
+import spatial
+from rainfall import to_seconds
+
+
+
+# =============
+# REPEAT SPILLS
+# =============
+
+
+KEYS = ['unit_id_1', 'unit_id_2', 'canonical_address']
+
+MISSING_KEYS = ['na', 'nan', '']
+
+
+def key_codes(values):
+    """
+    This function returns an integer code for every key value,
+    -1 for missing ones (NaN or the 'na' fill value).
+    """
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy().astype('int64')
+        missing = values.cat.categories.isin(MISSING_KEYS)
+        return np.where((codes >= 0) & ~missing[codes], codes, -1)
+    codes, _ = pd.factorize(values.where(~values.isin(MISSING_KEYS)))
+    return codes.astype('int64')
+
+
+def prior_counts(codes, seconds, window):
+    """
+    This function returns, for every event, the number of
+    events with the same key code in the window seconds
+    before it ([t - window, t)). The events are sorted once
+    by code * span + seconds, so every count is two binary
+    searches. Events without a key (-1) get -1.
+    """
+    codes = np.asarray(codes, dtype='int64')
+    seconds = np.asarray(seconds, dtype='int64')
+    if not len(codes):
+        return np.zeros(0, dtype='int64')
+    seconds = seconds - seconds.min()
+    span = int(seconds.max()) + window + 1
+
+    keys = codes * span + seconds + window
+    ordered = np.sort(keys[codes >= 0])
+    counts = np.searchsorted(ordered, keys, side='left') - np.searchsorted(ordered, keys - window, side='left')
+    return np.where(codes >= 0, counts, -1)
+
+
+def nearby_counts(lat, lon, seconds, window, radius, tree=None):
+    """
+    This function returns, for every event, the number of
+    other events within radius metres in the window seconds
+    before it, using a haversine ball tree instead of
+    comparing every pair. Events without coordinates get -1.
+    """
+    lat = np.asarray(lat, dtype='float64')
+    lon = np.asarray(lon, dtype='float64')
+    seconds = np.asarray(seconds, dtype='int64')
+    located = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+    counts = np.full(len(lat), -1, dtype='int64')
+    if not len(located):
+        return counts
+    if tree is None:
+        tree = spatial.build_tree(lat[located], lon[located])
+    points = np.radians(np.column_stack([lat[located], lon[located]]))
+    neighbours = tree.query_radius(points, r=radius / 1000 / spatial.EARTH_RADIUS_KM)
+
+    sizes = np.array([len(found) for found in neighbours])
+    source = np.repeat(np.arange(len(located)), sizes)
+    found = located[np.concatenate(neighbours)] if sizes.sum() else np.zeros(0, dtype='int64')
+    t = seconds[located][source]
+    earlier = (seconds[found] < t) & (seconds[found] >= t - window)
+    counts[located] = np.bincount(source[earlier], minlength=len(located))
+    return counts
+
+
+def repeat_spills(spills, window='730D', radius=100, time='report_date', keys=KEYS,
+                  lat='lat', lon='long', tree=None):
+    """
+    This function returns a copy of spills with the number of
+    earlier spills in the trailing window (a timedelta string,
+    730D = 24 months) at the same value of each key
+    (prior_<key>) and within radius metres (prior_<radius>m).
+    The counts are -1 when the key or the coordinates are
+    missing.
+    """
+    seconds, no_time = to_seconds(spills[time])
+    if no_time.any():
+        raise ValueError('{} has missing values'.format(time))
+    window = int(pd.Timedelta(window).total_seconds())
+
+    columns = {}
+    for key in keys:
+        if key in spills.columns:
+            columns['prior_' + key] = prior_counts(key_codes(spills[key]), seconds, window)
+    if radius and lat in spills.columns and lon in spills.columns:
+        columns['prior_{}m'.format(radius)] = nearby_counts(spills[lat], spills[lon], seconds,
+                                                            window, radius, tree=tree)
+    return spills.assign(**columns)
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the acquire scripts:
+
+1. acquire_sso.py
+2. acquire_sara.py
+3. acquire_aqi.py
+
+It declares the column types of every raw dataset so that
+pd.read_csv does not have to infer them.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+
+
+
+# =======
+# SCHEMAS
+# =======
+
+
+SSO_SCHEMA = {
+    'dtype': {'SSO_ID': 'Int32',
+              'INSPKEY': 'Int32',
+              'SERVNO': 'Int32',
+              'SPILL_ADDRESS': 'Int32',
+              'TOTAL_GAL': 'Int32',
+              'CAUSE': 'category',
+              'ACTIONS': 'category',
+              'WATERSHED': 'category',
+              'DISCHARGE_TO': 'category',
+              'DISCHARGE_ROUTE': 'category',
+              'COUNCIL_DISTRICT': 'Int8',
+              'Month': 'Int8',
+              'Year': 'Int16',
+              'Week': 'Int8',
+              'EARZ_ZONE': 'Int8',
+              'Expr1029': 'category',
+              'PIPETYPE': 'category',
+              'INSTYEAR': 'Int16',
+              'NUM_SPILLS_COMPKEY': 'Int16',
+              'NUM_SPILLS_24MOS': 'Int16',
+              'UNITTYPE': 'category',
+              'ASSETTYPE': 'category',
+              'TIMEINT': 'Int16',
+              'Root_Cause': 'category',
+              },
+    'date_format': {'REPORTDATE': '%m/%d/%y',
+                    'LASTCLND': '%d-%b-%y',
+                    'ResponseDTTM': '%d-%b-%y',
+                    },
+}
+
+SARA_RAINFALL_DETAILS_SCHEMA = {
+    'dtype': {'location_name': 'category',
+              'five_minute_rainfall': 'float64',
+              },
+    'date_format': {'date_time': '%Y-%m-%d %H:%M:%S'},
+}
+
+SARA_RAINFALL_SUMMARY_SCHEMA = {
+    'dtype': {'location_name': 'category',
+              'daily_rainfall_total_inches': 'float64',
+              },
+    'date_format': {'date': '%Y-%m-%d'},
+}
+
+SARA_FLOOD_SCHEMA = {
+    'dtype': {'location_name': 'category'},
+    'date_format': {'date': '%Y-%m-%d'},
+}
+
+AQI_SCHEMA = {
+    'dtype': {'Airmonitor Name': 'category',
+              'Airmonitor Address Zip': 'category',
+              'Airmonitor Address State': 'category',
+              'Airmonitor Address City': 'category',
+              'Airmonitor Address Street': 'category',
+              'AirmonitorReading NO2 AQI': 'Int16',
+              'AirmonitorReading SO2 AQI': 'Int16',
+              'AirmonitorReading O3 AQI': 'Int16',
+              'AirmonitorReading CO AQI': 'Int16',
+              'AirmonitorReading VOC AQI': 'Int16',
+              'AirmonitorReading PM2Point5 AQI': 'Int16',
+              'AirmonitorReading PM10 AQI': 'Int16',
+              'AirmonitorReading AirmonitorReading FinalAQI': 'Int16',
+              },
+    'date_format': {'AirmonitorReading TimeStamp': '%m/%d/%Y %I:%M:%S %p'},
+}
+
+SCHEMAS = {
+    'SAWS_SSOs_2009-2018Mar_UploadData.csv': SSO_SCHEMA,
+    'saws-sso.csv': SSO_SCHEMA,
+    'saws-ssos.csv': SSO_SCHEMA,
+    'sara-rainfall-details.csv': SARA_RAINFALL_DETAILS_SCHEMA,
+    'sara-rainfall-summary.csv': SARA_RAINFALL_SUMMARY_SCHEMA,
+    'sara-flood-stage-levels.csv': SARA_FLOOD_SCHEMA,
+    'cosa-air-quality.csv': AQI_SCHEMA,
+}
+
+
+def read_options(filename):
+    """
+    This function returns the pd.read_csv keyword arguments
+    (dtype, parse_dates and date_format) for a raw dataset.
+    Monthly drops (saws-sso-2019-04.csv) use the schema of
+    their dataset. Unknown files get no options and are
+    inferred as before.
+    """
+    name = os.path.basename(filename)
+    schema = SCHEMAS.get(name)
+    if schema is None:
+        drops = [key for key in SCHEMAS if name.startswith(os.path.splitext(key)[0] + '-')]
+        schema = SCHEMAS[max(drops, key=len)] if drops else None
+    if schema is None:
+        return {}
+    options = {'dtype': dict(schema['dtype'])}
+    if schema.get('date_format'):
+        options['parse_dates'] = list(schema['date_format'])
+        options['date_format'] = dict(schema['date_format'])
+    return options
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following scripts:
+
+1. acquire_sso.py
+2. acquire_sara.py
+3. acquire_aqi.py
+
+It finds the data files. The data directory is, in order:
+the SAWS_DATA_DIR environment variable, the path of a local
+env.py, or the data directory of this repository. A file name
+can also be
+
+- a compressed file (.gz, .zst, .zip, .bz2, .xz), read
+  through streaming decompression; saws-sso.csv falls back to
+  saws-sso.csv.gz etc. when only the archive is kept,
+- a glob pattern of monthly drops ('saws-sso-2019-*.csv.gz'),
+  whose files are read one by one and stacked.
+
+Uncompressed files are memory-mapped while they are parsed.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import re
+import sys
+import glob
+import importlib.util
+
+import pandas as pd
+
+from pandas.api.types import union_categoricals
+
+import cache
+
+
+
+# =======
+# SOURCES
+# =======
+
+
+DATA_DIR_VARIABLE = 'SAWS_DATA_DIR'
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+COMPRESSIONS = {'.gz': 'gzip',
+                '.zst': 'zstd',
+                '.zip': 'zip',
+                '.bz2': 'bz2',
+                '.xz': 'xz',
+                }
+
+COMPRESSION_PATTERN = re.compile(r'({})$'.format('|'.join(re.escape(ext) for ext in COMPRESSIONS)))
+
+
+def data_root():
+    """
+    This function returns the data directory.
+    """
+    if os.environ.get(DATA_DIR_VARIABLE):
+        return os.environ[DATA_DIR_VARIABLE]
+    try:
+        from env import path
+        return path
+    except ImportError:
+        return DEFAULT_DATA_DIR
+
+
+def base_name(filename):
+    """
+    This function returns the file name without its directory
+    and compression extension: data/saws-sso.csv.gz -> saws-sso.csv
+    """
+    return COMPRESSION_PATTERN.sub('', os.path.basename(filename))
+
+
+def compression(filepath):
+    """
+    This function returns the compression of a file from its
+    extension, or None. Reading .zst files needs the optional
+    zstandard package.
+    """
+    match = COMPRESSION_PATTERN.search(filepath)
+    if match is None:
+        return None
+    method = COMPRESSIONS[match.group(1)]
+    if method == 'zstd' and importlib.util.find_spec('zstandard') is None:
+        raise ImportError('reading {} needs the zstandard package (pip install zstandard)'.format(filepath))
+    return method
+
+
+def source_paths(filename, root=None):
+    """
+    This function returns the files a file name or glob
+    pattern stands for, relative to the data directory unless
+    it is absolute. A missing file is looked for compressed.
+    """
+    filepath = os.path.join(data_root() if root is None else root, filename)
+    if glob.has_magic(filepath):
+        paths = sorted(glob.glob(filepath))
+    elif os.path.exists(filepath):
+        paths = [filepath]
+    else:
+        paths = [filepath + ext for ext in COMPRESSIONS if os.path.exists(filepath + ext)][:1]
+    if not paths:
+        raise FileNotFoundError('no data file matches {}'.format(filepath))
+    return paths
+
+
+def source_path(filename, root=None):
+    """
+    This function returns the single file a file name stands for.
+    """
+    paths = source_paths(filename, root)
+    if len(paths) > 1:
+        raise ValueError('{} matches {} files'.format(filename, len(paths)))
+    return paths[0]
+
+
+def reader_options(filepath, memory_map=True):
+    """
+    This function returns the read_csv options of a file:
+    its compression, or memory_map for uncompressed files.
+    """
+    method = compression(filepath)
+    if method is not None:
+        return {'compression': method}
+    return {'memory_map': True} if memory_map else {}
+
+
+def read_csv(filename, use_cache=True, root=None, memory_map=True, **kwargs):
+    """
+    This function reads a data file, or every file of a glob
+    pattern stacked in name order, with the csv cache (see
+    cache.py) keeping one columnar copy per file.
+    """
+    frames = [cache.read_csv_cached(filepath, cache=use_cache,
+                                    **reader_options(filepath, memory_map), **kwargs)
+              for filepath in source_paths(filename, root)]
+    if len(frames) == 1:
+        return frames[0]
+    return stack_frames(frames)
+
+
+def stack_frames(frames):
+    """
+    This function stacks frames read from several files.
+    Categorical columns stay categorical with the union of
+    the categories of every file.
+    """
+    stacked = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        columns = [frame[col] for frame in frames]
+        if all(isinstance(column.dtype, pd.CategoricalDtype) for column in columns):
+            if len(set(str(column.cat.categories.dtype) for column in columns)) > 1:
+                columns = [column.cat.set_categories(column.cat.categories.astype(object))
+                           for column in columns]
+            stacked[col] = union_categoricals(columns, sort_categories=True)
+    return stacked
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
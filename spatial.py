@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. dd-sara.ipynb
+2.
+3.
+
+It links geocoded spills (sso-geocoded.csv, dd-geocoded.csv) to
+the SARA rainfall and flood gauges nearest to them.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+
+import pandas as pd
+import numpy as np
+
+
+
+# =============
+# SPATIAL INDEX
+# =============
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def gauge_locations(*frames):
+    """
+    This function returns the distinct gauges (location_name,
+    latitude, longitude) of one or more SARA datasets.
+    """
+    gauges = pd.concat([frame[['location_name', 'latitude', 'longitude']] for frame in frames])
+    gauges = gauges.assign(location_name=gauges['location_name'].astype(str))
+    gauges = gauges.dropna().drop_duplicates(subset='location_name')
+    return gauges.sort_values('location_name').reset_index(drop=True)
+
+
+def build_tree(lat, lon):
+    """
+    This function returns a ball tree over the points with
+    the haversine metric. Distances it returns are in radians.
+    """
+    from sklearn.neighbors import BallTree  # imported here, it takes seconds to load
+
+    points = np.radians(np.column_stack([np.asarray(lat, dtype='float64'),
+                                         np.asarray(lon, dtype='float64')]))
+    return BallTree(points, metric='haversine')
+
+
+def nearest_gauges(spills, gauges, k=3, lat='lat', lon='long', prefix='gauge', tree=None):
+    """
+    This function returns a copy of spills with the k nearest
+    gauges of every spill and their distance in kilometres:
+    gauge_1, gauge_1_km, gauge_2, gauge_2_km, ...
+    Spills without coordinates get NaN.
+    """
+    k = min(k, len(gauges))
+    if tree is None:
+        tree = build_tree(gauges['latitude'], gauges['longitude'])
+    names = gauges['location_name'].astype(str).to_numpy()
+
+    located = spills[[lat, lon]].notna().all(axis=1).to_numpy()
+    points = np.radians(spills.loc[located, [lat, lon]].to_numpy(dtype='float64'))
+    distances, indices = tree.query(points, k=k) if len(points) else (np.empty((0, k)), np.empty((0, k), int))
+
+    columns = {}
+    for i in range(k):
+        name = np.full(len(spills), np.nan, dtype=object)
+        name[located] = names[indices[:, i]]
+        km = np.full(len(spills), np.nan)
+        km[located] = distances[:, i] * EARTH_RADIUS_KM
+        columns['{}_{}'.format(prefix, i + 1)] = name
+        columns['{}_{}_km'.format(prefix, i + 1)] = km
+    return spills.assign(**columns)
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
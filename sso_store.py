@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. master-sso.ipynb
+2.
+3.
+
+It keeps the cleaned spills in a store partitioned by year and
+month (data/sso-store/year=2019/month=03/part.parquet) and adds
+a new SAWS snapshot to it incrementally: only the spills that
+are new or changed since the last refresh, by SSO_ID/INSPKEY and
+a hash of the raw row, are cleaned with prepare_sso and merged
+into the partitions they touch.
+
+    store = sso_store.SSOStore()
+    store.update(acquire_sso.read_data('saws-sso.csv'))
+    spills = store.read()
+
+The store is append-only: spills that disappear from a
+snapshot are kept.
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+import json
+import glob
+
+import pandas as pd
+import numpy as np
+
+import cache
+import sources
+import addresses
+import prepare_sso
+
+
+
+# =====
+# STORE
+# =====
+
+
+KEY = ['SSO_ID', 'INSPKEY']
+
+CLEAN_KEY = ['sso_id', 'inspection_key']
+
+DATE = 'REPORTDATE'
+
+UNKNOWN = 'year=unknown/month=unknown'
+
+
+def row_hashes(raw):
+    """
+    This function returns a 64 bit hash of every raw row.
+    Categorical values hash like their plain values, so the
+    hash does not depend on the categories of a snapshot.
+    """
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def partitions(dates):
+    """
+    This function returns the year=YYYY/month=MM partition
+    of every date (year=unknown/month=unknown for missing
+    dates, so read() finds them like any other partition).
+    """
+    dates = pd.to_datetime(pd.Series(dates))
+    labels = 'year=' + dates.dt.strftime('%Y') + '/month=' + dates.dt.strftime('%m')
+    return labels.fillna(UNKNOWN).to_numpy(dtype=object)
+
+
+def address_forms(raw):
+    """
+    This function returns the canonical street address of
+    every raw spill before suffix folding (see addresses.py).
+    """
+    renamed = prepare_sso.lowercase_and_rename(raw[['SPILL_ADDRESS', 'SPILL_ST_NAME']].copy())
+    forms = addresses.normalize_addresses(prepare_sso.spill_street_address(renamed))
+    return forms.to_numpy(dtype=object)
+
+
+def categorical(values):
+    """
+    This function returns values as a categorical with the
+    sorted distinct values as categories, like address_ids().
+    """
+    values = pd.Series(values, dtype=object)
+    categories = pd.Index(values.dropna().unique(), dtype=object).sort_values()
+    return pd.Categorical(values, categories=categories)
+
+
+def columnar(df):
+    """
+    This function makes the object columns of a cleaned frame
+    storable in parquet: numbers mixed with number strings
+    become floats and other mixed columns become strings,
+    with missing values kept as nulls.
+    """
+    for col in df.columns[df.dtypes == object]:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            df[col] = df[col].astype('string')
+    return df
+
+
+class SSOStore:
+    """
+    This class is the partitioned store of cleaned spills.
+
+    Next to the partitions it keeps hashes.parquet, with the key,
+    row hash, partition, canonical address and address key of
+    every stored spill, and state.json, with the high-water mark:
+    the latest report date stored.
+
+    An address key depends on every address stored (an address
+    without a street suffix takes the key of its only suffixed
+    variant), so the keys are recomputed over the whole store on
+    every refresh and the partitions whose keys changed are
+    rewritten, which keeps canonical_address equal to that of a
+    full clean.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(sources.data_root(), 'sso-store')
+        self.hashes = self.read_hashes()
+        self.state = self.read_state()
+
+    @property
+    def watermark(self):
+        mark = self.state.get('watermark')
+        return None if mark is None else pd.Timestamp(mark)
+
+    def read_hashes(self):
+        target = os.path.join(self.directory, 'hashes.parquet')
+        if os.path.exists(target):
+            return pd.read_parquet(target).astype({'partition': object, 'address': object,
+                                                   'canonical_address': object})
+        return pd.DataFrame({'SSO_ID': pd.Series(dtype='int64'),
+                             'INSPKEY': pd.Series(dtype='Int64'),
+                             'row_hash': pd.Series(dtype='uint64'),
+                             'partition': pd.Series(dtype=object),
+                             'address': pd.Series(dtype=object),
+                             'canonical_address': pd.Series(dtype=object)})
+
+    def read_state(self):
+        target = os.path.join(self.directory, 'state.json')
+        if os.path.exists(target):
+            with open(target) as f:
+                return json.load(f)
+        return {'watermark': None}
+
+    def partition_path(self, partition):
+        return os.path.join(self.directory, partition, 'part.parquet')
+
+    def delta(self, raw, lookback=None):
+        """
+        This method returns the rows of a raw snapshot
+        (acquire_sso.read_data()) that are not stored yet or
+        whose raw values changed, their row hashes and the
+        stored partitions of the changed ones. With lookback
+        (e.g. '90D') only stored spills reported after the
+        watermark minus lookback are checked for changes;
+        new spills are always found.
+        """
+        keys = raw[KEY].astype('Int64').reset_index(drop=True)
+        keys['row_hash'] = row_hashes(raw)
+        merged = keys.merge(self.hashes, on=KEY, how='left', suffixes=('', '_stored'))
+        new = merged['row_hash_stored'].isna().to_numpy()
+        changed = ~new & (merged['row_hash'] != merged['row_hash_stored']).to_numpy()
+        if lookback is not None and self.watermark is not None:
+            recent = (raw[DATE] >= self.watermark - pd.Timedelta(lookback)).to_numpy()
+            changed &= recent
+        rows = new | changed
+        delta = raw[rows]
+        return delta, keys.loc[rows, 'row_hash'].to_numpy(), merged.loc[rows & changed, 'partition']
+
+    def update(self, raw, lookback=None):
+        """
+        This method cleans the new and changed rows of a raw
+        snapshot with prepare_sso.prepare() and merges them into
+        their partitions, and returns a summary of the refresh.
+        """
+        delta, hashes, moved = self.delta(raw, lookback)
+        summary = {'rows': len(raw), 'new': len(delta) - len(moved), 'changed': len(moved), 'partitions': []}
+        if not len(delta):
+            return summary
+
+        cleaned = prepare_sso.prepare(delta.reset_index(drop=True), use_cache=False)
+        cleaned.insert(0, CLEAN_KEY[1], delta['INSPKEY'].to_numpy())
+        cleaned.insert(0, CLEAN_KEY[0], delta['SSO_ID'].to_numpy())
+        cleaned = columnar(cleaned)
+        labels = partitions(cleaned['report_date'])
+        rekeyed = self.merge_hashes(delta, hashes, labels)
+
+        keys = pd.MultiIndex.from_frame(cleaned[CLEAN_KEY].astype('Int64'))
+        touched = sorted(set(labels) | set(moved.dropna()) | set(rekeyed))
+        for partition in touched:
+            target = self.partition_path(partition)
+            parts = []
+            if os.path.exists(target):
+                stored = cache.read_cache(target)
+                stored_keys = pd.MultiIndex.from_frame(stored[CLEAN_KEY].astype('Int64'))
+                parts.append(stored[~stored_keys.isin(keys)])
+            parts.append(cleaned[labels == partition])
+            parts = [part for part in parts if len(part)] or parts[-1:]
+            frame = sources.stack_frames(parts).reset_index(drop=True) if len(parts) > 1 else parts[0]
+            if len(frame):
+                frame['canonical_address'] = self.address_keys(frame)
+                cache.save_frame(frame, target)
+            elif os.path.exists(target):
+                os.remove(target)
+        summary['partitions'] = touched
+
+        self.save_state()
+        return summary
+
+    def merge_hashes(self, delta, hashes, labels):
+        """
+        This method records the key, row hash, partition and
+        canonical address of the merged rows, replacing their
+        old entries, recomputes the address keys of the store
+        and returns the partitions of the stored spills whose
+        address key changed.
+        """
+        new = pd.DataFrame({'SSO_ID': delta['SSO_ID'].to_numpy().astype('int64'),
+                            'INSPKEY': delta['INSPKEY'].astype('Int64').to_numpy(),
+                            'row_hash': hashes,
+                            'partition': labels,
+                            'address': address_forms(delta),
+                            'canonical_address': np.nan})
+        old_keys = pd.MultiIndex.from_frame(self.hashes[KEY].astype('Int64'))
+        new_keys = pd.MultiIndex.from_frame(new[KEY].astype('Int64'))
+        kept = self.hashes[~old_keys.isin(new_keys)]
+        self.hashes = pd.concat([kept, new], ignore_index=True) if len(kept) else new
+
+        address_keys = addresses.address_keys(self.hashes['address']).to_numpy(dtype=object)
+        stored = self.hashes['canonical_address'].to_numpy(dtype=object)
+        changed = ~pd.isna(stored) & (pd.Series(stored).fillna('') != pd.Series(address_keys).fillna('')).to_numpy()
+        self.hashes['canonical_address'] = address_keys
+
+        dates = delta[DATE].dropna()
+        if len(dates):
+            mark = dates.max() if self.watermark is None else max(self.watermark, dates.max())
+            self.state['watermark'] = mark.isoformat()
+        return set(self.hashes.loc[changed, 'partition'])
+
+    def address_keys(self, frame):
+        """
+        This method returns the recorded address keys of the
+        spills of a partition as a categorical.
+        """
+        index = pd.MultiIndex.from_frame(self.hashes[KEY].astype('Int64'))
+        rows = index.get_indexer(pd.MultiIndex.from_frame(frame[CLEAN_KEY].astype('Int64')))
+        return categorical(self.hashes['canonical_address'].to_numpy(dtype=object)[rows])
+
+    def save_state(self):
+        """
+        This method writes hashes.parquet and state.json.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        cache.save_frame(self.hashes, os.path.join(self.directory, 'hashes.parquet'))
+        target = os.path.join(self.directory, 'state.json')
+        with open(target + '.tmp', 'w') as f:
+            json.dump(self.state, f)
+        os.replace(target + '.tmp', target)
+
+    def read(self, names=None):
+        """
+        This method returns the stored spills, or those of
+        some partitions ('year=2019/month=03', globs work).
+        """
+        patterns = names or ['*/*']
+        files = sorted(set(path for pattern in np.atleast_1d(patterns)
+                           for path in glob.glob(self.partition_path(pattern))))
+        if not files:
+            return pd.DataFrame()
+        frames = [cache.read_cache(path) for path in files]
+        return sources.stack_frames(frames) if len(frames) > 1 else frames[0]
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+
+"""
+Tests of acquire_sara.stream_data: the streamed rows are the
+rows of the whole file that pass the same filters.
+
+    python -m pytest test_acquire_sara.py
+"""
+
+
+import pandas as pd
+import pytest
+
+import acquire_sara
+
+
+FILENAME = 'sara-rainfall-details.csv'
+
+
+@pytest.fixture(scope='module')
+def details():
+    return pd.concat(acquire_sara.stream_data(FILENAME), ignore_index=True)
+
+
+def test_a_date_only_end_keeps_the_whole_day(details):
+    last_day = details['date_time'].max().normalize()
+    streamed = pd.concat(acquire_sara.stream_data(FILENAME, chunksize=5000,
+                                                  end=last_day.strftime('%Y-%m-%d')))
+    assert len(streamed) == len(details) > (details['date_time'] <= last_day).sum()
+
+
+def test_an_end_with_a_time_is_inclusive(details):
+    times = details['date_time']
+    end = times[times != times.dt.normalize()].sort_values().iloc[len(times) // 2]
+    streamed = pd.concat(acquire_sara.stream_data(FILENAME, chunksize=5000, end=end))
+    assert len(streamed) == (details['date_time'] <= end).sum()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+
+"""
+Tests of addresses.py: which words of an address are
+abbreviated and which spellings share a key.
+
+    python -m pytest test_addresses.py
+"""
+
+
+import pandas as pd
+import pytest
+
+import addresses
+
+
+@pytest.mark.parametrize('address, form', [
+    ('6804 South Flores Street, San Antonio', '6804 S FLORES ST'),
+    ('6804 s. flores', '6804 S FLORES'),
+    ('200 Court St', '200 COURT ST'),
+    ('100 West Ave', '100 WEST AVE'),
+    ('100 Court', '100 COURT'),
+    ('300 North West Loop', '300 N WEST LOOP'),
+    ('12251 Fairview Lane', '12251 FAIRVIEW LN'),
+])
+def test_only_the_suffix_and_the_leading_directional_are_abbreviated(address, form):
+    assert addresses.normalize_address(address) == form
+    assert addresses.normalize_address(form) == form
+
+
+def test_a_suffixless_address_folds_onto_its_only_suffixed_variant():
+    keys = addresses.address_keys(pd.Series(['6804 S Flores', '6804 S Flores St', '12251 Fairview',
+                                             '12251 Fairview Ave', '12251 Fairview Ln', None]))
+    assert keys.tolist()[:5] == ['6804 S FLORES ST', '6804 S FLORES ST', '12251 FAIRVIEW',
+                                 '12251 FAIRVIEW AVE', '12251 FAIRVIEW LN']
+    assert keys.isna().tolist()[5]
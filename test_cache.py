@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+"""
+Tests of cache.py: a cache hit returns the same frame as the
+miss that stored it.
+
+    python -m pytest test_cache.py
+"""
+
+
+import pandas as pd
+
+import cache
+
+
+def test_stage_hit_equals_miss(tmp_path, monkeypatch):
+    monkeypatch.setenv('SAWS_STAGE_CACHE_DIR', str(tmp_path))
+    calls = []
+
+    @cache.memoize_stage()
+    def stage(df):
+        calls.append(1)
+        return df.assign(key=pd.Categorical(df['name'].astype(object)))
+
+    df = pd.DataFrame({'name': ['b', 'a', None], 'value': [1.5, 2.0, None]})
+    miss = stage(df)
+    hit = stage(df)
+    assert len(calls) == 1
+    assert miss.attrs == hit.attrs == {}
+    pd.testing.assert_frame_equal(hit, miss)
+
+
+def test_only_copies_of_another_version_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setenv('SAWS_CACHE_DIR', str(tmp_path / 'cache'))
+    source = tmp_path / 'spills.csv'
+    source.write_text('a,b\n1,x\n2,y\n')
+    cache.read_csv_cached(str(source))
+    narrow = cache.read_csv_cached(str(source), usecols=['a'])
+    assert len(cache.cached_copies(str(source))) == 2
+    assert cache.read_csv_cached(str(source), usecols=['a']).attrs['cache_path'] == narrow.attrs['cache_path']
+
+    source.write_text('a,b\n1,x\n2,y\n3,z\n')
+    df = cache.read_csv_cached(str(source))
+    assert cache.cached_copies(str(source)) == [df.attrs['cache_path']]
+    assert len(df) == 3
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+"""
+Tests of geocode.py: the address-keyed cache, checkpoints and
+resume, retries, rate limiting, and the sync and async paths
+against the local fake geocoding server (the async tests need
+aiohttp).
+
+    python -m pytest test_geocode.py
+"""
+
+
+import time
+
+import pandas as pd
+import pytest
+
+import geocode
+
+
+ADDRESSES = ['{} N MAIN AVE'.format(number) for number in range(100, 125)]
+
+
+class StubBackend:
+    """
+    A backend that answers in process with fake_location()
+    and counts the addresses it was asked for. Batches listed
+    in fail are answered with an error.
+    """
+
+    batch_size = 5
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def geocode_batch(self, addresses):
+        self.calls.append(list(addresses))
+        if len(self.calls) in self.fail:
+            raise OSError('service unavailable')
+        return [row(address) for address in addresses]
+
+
+def row(location):
+    found = geocode.fake_location(location)
+    return found['postalCode'], found['latLng']['lat'], found['latLng']['lng']
+
+
+def empty_cache(tmp_path):
+    return geocode.GeocodeCache(filepath=str(tmp_path / 'geocode-cache.csv'), seed_directory=None)
+
+
+def requested(backend):
+    return [address for call in backend.calls for address in call]
+
+
+def test_cache_lookup_hits_and_misses(tmp_path):
+    cache = empty_cache(tmp_path)
+    cache.update(pd.DataFrame({'zip': ['78204'], 'lat': [29.4], 'long': [-98.5]},
+                              index=pd.Index(['6804 S FLORES ST'], name='key')))
+    assert list(cache.missing(['6804 S FLORES ST', '100 N MAIN AVE', None])) == ['100 N MAIN AVE']
+    found = cache.lookup(['100 N MAIN AVE', '6804 S FLORES ST'])
+    assert found['lat'].isna().tolist() == [True, False]
+    assert found.loc['6804 S FLORES ST', 'zip'] == '78204'
+
+
+def test_geocode_only_sends_misses(tmp_path):
+    cache = empty_cache(tmp_path)
+    backend = StubBackend()
+    first = geocode.geocode(ADDRESSES[:10], backend=backend, cache=cache, rate=None)
+    assert requested(backend) == ADDRESSES[:10]
+    assert first['lat'].notna().all()
+
+    backend.calls.clear()
+    second = geocode.geocode(ADDRESSES, backend=backend, cache=cache, rate=None)
+    assert requested(backend) == ADDRESSES[10:]
+    pd.testing.assert_frame_equal(second.iloc[:10], first)
+
+
+def test_spellings_share_an_entry_but_streets_do_not(tmp_path):
+    cache = empty_cache(tmp_path)
+    backend = StubBackend()
+    found = geocode.geocode(['6804 South Flores Street, San Antonio', '6804 S FLORES',
+                             '12251 Fairview Ave', '12251 Fairview Ln'],
+                            backend=backend, cache=cache, rate=None)
+    assert requested(backend) == ['6804 South Flores Street, San Antonio', '12251 Fairview Ave',
+                                  '12251 Fairview Ln']
+    assert found['lat'].iloc[0] == found['lat'].iloc[1]
+    assert found['lat'].iloc[2] != found['lat'].iloc[3]
+
+    backend.calls.clear()
+    geocode.geocode(['6804 S Flores'], backend=backend, cache=cache, rate=None)
+    assert backend.calls == []
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(tmp_path):
+    backend = StubBackend(fail=[5])
+    with pytest.raises(OSError):
+        geocode.geocode(ADDRESSES, backend=backend, cache=empty_cache(tmp_path), workers=1, rate=None,
+                        retries=0, checkpoint=1)
+
+    assert len(empty_cache(tmp_path)) == 20
+
+    resumed = StubBackend()
+    found = geocode.geocode(ADDRESSES, backend=resumed, cache=empty_cache(tmp_path), rate=None)
+    assert requested(resumed) == ADDRESSES[20:]
+    assert found['lat'].notna().all()
+
+
+def test_failed_batches_are_retried(tmp_path):
+    backend = StubBackend(fail=[1, 2])
+    found = geocode.geocode(ADDRESSES[:5], backend=backend, cache=empty_cache(tmp_path), rate=None,
+                            backoff=0.001)
+    assert len(backend.calls) == 3
+    assert found['lat'].notna().all()
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = geocode.RateLimiter(20)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    assert time.monotonic() - start >= 4 / 20 - 0.01
+
+
+def test_geocode_respects_the_rate(tmp_path):
+    start = time.monotonic()
+    geocode.geocode(ADDRESSES, backend=StubBackend(), cache=empty_cache(tmp_path), rate=20)
+    assert time.monotonic() - start >= 4 / 20 - 0.01
+
+
+def expected_lat(addresses):
+    return [geocode.fake_location('{} San Antonio TX'.format(address))['latLng']['lat']
+            for address in addresses]
+
+
+def test_sync_against_the_fake_server(tmp_path):
+    addresses = ADDRESSES[::-1]
+    with geocode.FakeGeocodeServer() as server:
+        backend = geocode.MapQuestBackend(key='', url=server.url)
+        found = geocode.geocode(addresses, backend=backend, cache=empty_cache(tmp_path), batch_size=5,
+                                rate=None)
+        assert server.requests == 5
+    assert found['address'].tolist() == addresses
+    assert found['lat'].tolist() == expected_lat(addresses)
+
+
+def test_sync_retries_the_fake_server_errors(tmp_path):
+    with geocode.FakeGeocodeServer(fail_every=2) as server:
+        backend = geocode.MapQuestBackend(key='', url=server.url)
+        found = geocode.geocode(ADDRESSES, backend=backend, cache=empty_cache(tmp_path), batch_size=5,
+                                workers=1, rate=None, backoff=0.001)
+        assert server.requests == 9
+    assert found['lat'].tolist() == expected_lat(ADDRESSES)
+
+
+def test_async_against_the_fake_server(tmp_path):
+    pytest.importorskip('aiohttp')
+    addresses = ADDRESSES[::-1]
+    with geocode.FakeGeocodeServer(fail_every=3) as server:
+        backend = geocode.AsyncMapQuestBackend(key='', url=server.url)
+        found = geocode.geocode_concurrent(addresses, backend=backend, cache=empty_cache(tmp_path),
+                                           batch_size=5, concurrency=3, backoff=0.001)
+        assert server.requests > 5
+    assert found['address'].tolist() == addresses
+    assert found['lat'].tolist() == expected_lat(addresses)
+
+
+def test_async_saves_what_it_got_before_giving_up(tmp_path):
+    pytest.importorskip('aiohttp')
+    with geocode.FakeGeocodeServer(fail_every=2) as server:
+        backend = geocode.AsyncMapQuestBackend(key='', url=server.url)
+        with pytest.warns(UserWarning, match='batches failed'):
+            found = geocode.geocode_concurrent(ADDRESSES, backend=backend, cache=empty_cache(tmp_path),
+                                               batch_size=5, concurrency=1, retries=0)
+    assert found['lat'].notna().sum() == len(empty_cache(tmp_path)) > 0
+
+    with geocode.FakeGeocodeServer() as server:
+        backend = geocode.AsyncMapQuestBackend(key='', url=server.url)
+        found = geocode.geocode_concurrent(ADDRESSES, backend=backend, cache=empty_cache(tmp_path),
+                                           batch_size=5)
+        assert server.requests == 2
+    assert found['lat'].tolist() == expected_lat(ADDRESSES)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+"""
+Tests of grid.py: cell ids south-west of the origin and the
+spill aggregates of every cell.
+
+    python -m pytest test_grid.py
+"""
+
+
+import numpy as np
+import pandas as pd
+
+import grid
+
+
+def test_missing_causes_do_not_compete():
+    spills = pd.DataFrame({'report_date': pd.to_datetime(['2018-01-02'] * 5),
+                           'total_gallons': [10, 20, 30, 40, 50],
+                           'root_cause': pd.Categorical([None, None, np.nan, 'Grease', 'Roots'])})
+    cells = grid.aggregate_cells(spills, [1, 1, 1, 1, 2], freq=None)
+    assert cells['spills'].tolist() == [4, 1]
+    assert cells['top_root_cause'].tolist() == ['Grease', 'Roots']
+    assert cells['top_root_causes'].tolist() == ['Grease', 'Roots']
+
+
+def test_cells_without_any_cause():
+    spills = pd.DataFrame({'report_date': pd.to_datetime(['2018-01-02', '2018-02-02']),
+                           'total_gallons': [10, 20], 'root_cause': [None, 'Grease']})
+    cells = grid.aggregate_cells(spills, [1, 2], freq='M')
+    assert cells['top_root_cause'].isna().tolist() == [True, False]
+    assert cells['total_gallons'].tolist() == [10, 20]
+
+
+def test_points_south_west_of_the_origin_get_their_own_cells():
+    lat = np.array([grid.ORIGIN_LAT - 0.005, grid.ORIGIN_LAT + 0.005, np.nan])
+    lon = np.array([grid.ORIGIN_LON - 0.005, grid.ORIGIN_LON + 0.005, np.nan])
+    cells = grid.square_cells(lat, lon)
+    assert cells[0] != cells[1] and cells[0] >= 0 and cells[2] == -1
+    centre_lat, centre_lon = grid.square_centers(cells[:2])
+    assert np.allclose(centre_lat, lat[:2]) and np.allclose(centre_lon, lon[:2])
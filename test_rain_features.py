@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""
+Tests of rain_features.py: the antecedent rainfall of every
+spill agrees with a scan of the readings of its gauges.
+
+    python -m pytest test_rain_features.py
+"""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import acquire_sara
+import rain_features
+
+
+@pytest.fixture(scope='module')
+def details():
+    details = pd.concat(acquire_sara.stream_data('sara-rainfall-details.csv'), ignore_index=True)
+    return details.assign(location_name=details['location_name'].astype(str))
+
+
+def random_spills(details, n, seed=0):
+    rng = np.random.default_rng(seed)
+    lo, hi = details['date_time'].min(), details['date_time'].max()
+    return pd.DataFrame({'lat': 29.42 + rng.normal(0, 0.15, n),
+                         'long': -98.49 + rng.normal(0, 0.15, n),
+                         'spill_start': pd.DatetimeIndex(lo + (hi - lo) * rng.random(n)).floor('min')})
+
+
+def scan(details, gauge, t0, t1):
+    readings = details[details['location_name'] == gauge]
+    if not len(readings) or t1 < readings['date_time'].min() or t0 > readings['date_time'].max():
+        return np.nan
+    inside = (readings['date_time'] > t0) & (readings['date_time'] <= t1)
+    return readings.loc[inside, 'five_minute_rainfall'].sum()
+
+
+def test_features_match_a_scan(details):
+    k = 3
+    features = rain_features.antecedent_rainfall(random_spills(details, 60), details, k=k)
+    for label, window in rain_features.WINDOWS.items():
+        for row in features.itertuples():
+            t1 = row.spill_start
+            totals = [scan(details, getattr(row, 'gauge_{}'.format(i + 1)), t1 - pd.Timedelta(window), t1)
+                      for i in range(k)]
+            km = np.array([getattr(row, 'gauge_{}_km'.format(i + 1)) for i in range(k)])
+            has_data = ~np.isnan(totals)
+            if not has_data.any():
+                assert np.isnan(getattr(row, 'rain_' + label))
+                continue
+            weights = np.where(has_data, 1.0 / np.maximum(km, 0.1), 0.0)
+            assert getattr(row, 'rain_' + label) == pytest.approx(np.array(totals)[has_data][0])
+            assert getattr(row, 'rain_{}_idw'.format(label)) == pytest.approx(
+                np.nansum(np.array(totals) * weights) / weights.sum())
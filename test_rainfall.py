@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+"""
+Tests of rainfall.py: an aggregator fed in several updates
+holds the totals of one fed everything at once, and both the
+aggregator and the index agree with a scan of the readings.
+
+    python -m pytest test_rainfall.py
+"""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import acquire_sara
+import rainfall
+
+
+@pytest.fixture(scope='module')
+def details():
+    details = pd.concat(acquire_sara.stream_data('sara-rainfall-details.csv'), ignore_index=True)
+    return details.assign(location_name=details['location_name'].astype(str))
+
+
+@pytest.fixture(scope='module')
+def full(details):
+    aggregator = rainfall.RainfallAggregator()
+    aggregator.update(details)
+    return aggregator
+
+
+def all_totals(aggregator):
+    frames = {period: aggregator.totals(period) for period in aggregator.periods}
+    frames['rolling'] = aggregator.rolling_totals()
+    return frames
+
+
+def assert_same_totals(left, right):
+    for name in left:
+        pd.testing.assert_frame_equal(left[name], right[name], check_exact=False, atol=1e-9)
+
+
+def test_incremental_updates_equal_one_update(details, full, tmp_path):
+    cuts = details['date_time'].quantile([0.3, 0.6]).tolist()
+    parts = [details[details['date_time'] < cuts[0]],
+             details[details['date_time'] >= cuts[1]],
+             details[(details['date_time'] >= cuts[0]) & (details['date_time'] < cuts[1])]]
+
+    incremental = rainfall.RainfallAggregator()
+    incremental.update(parts[0])
+    incremental.save(str(tmp_path))
+    incremental = rainfall.RainfallAggregator.load(str(tmp_path))
+    for part in parts[1:]:
+        incremental.update(part)
+    assert_same_totals(all_totals(incremental), all_totals(full))
+
+
+def test_feeding_the_same_readings_again_changes_nothing(details, full):
+    aggregator = rainfall.RainfallAggregator()
+    aggregator.update(details)
+    assert len(aggregator.update(details.sample(frac=0.5, random_state=0))) == 0
+    assert_same_totals(all_totals(aggregator), all_totals(full))
+
+
+def test_totals_match_a_scan(details, full):
+    daily = details.groupby(['location_name', details['date_time'].dt.normalize().rename('date')])
+    expected = daily['five_minute_rainfall'].sum().rename('rainfall').reset_index()
+    pd.testing.assert_frame_equal(full.daily_totals(), expected, check_exact=False, atol=1e-9,
+                                  check_dtype=False)
+
+    rolling = full.rolling_totals().sample(200, random_state=0)
+    hours = details['date_time'].dt.floor('h')
+    for row in rolling.itertuples():
+        at_gauge = details['location_name'] == row.location_name
+        for name, window in rainfall.WINDOWS.items():
+            inside = at_gauge & (hours > row.hour - pd.Timedelta(window)) & (hours <= row.hour)
+            assert getattr(row, name) == pytest.approx(details.loc[inside, 'five_minute_rainfall'].sum())
+
+
+def random_windows(details, n, seed=0):
+    rng = np.random.default_rng(seed)
+    gauges = rng.choice(details['location_name'].unique(), n)
+    lo, hi = details['date_time'].min(), details['date_time'].max()
+    t0 = lo + (hi - lo) * rng.random(n)
+    t1 = t0 + pd.to_timedelta(rng.integers(5, 14 * 24 * 60, n), unit='min')
+    return gauges, pd.DatetimeIndex(t0).floor('min'), pd.DatetimeIndex(t1).floor('min')
+
+
+def scan(details, gauge, t0, t1):
+    inside = ((details['location_name'] == gauge) & (details['date_time'] > t0)
+              & (details['date_time'] <= t1))
+    return details.loc[inside, 'five_minute_rainfall'].sum()
+
+
+def test_index_window_totals_match_a_scan(details, tmp_path):
+    index = rainfall.RainfallIndex.build(details, str(tmp_path))
+    gauges, t0, t1 = random_windows(details, 300)
+    expected = np.round([scan(details, *window) for window in zip(gauges, t0, t1)], 2)
+
+    assert np.array_equal(index.window_totals(gauges, t0, t1, covered=False), expected)
+    loaded = rainfall.RainfallIndex.load(str(tmp_path))
+    assert np.array_equal(loaded.window_totals(gauges, t0, t1, covered=False), expected)
+
+
+def test_index_gives_nan_outside_a_gauge_or_its_readings(details):
+    index = rainfall.RainfallIndex.from_details(details)
+    gauge = details['location_name'].iloc[0]
+    before = details.loc[details['location_name'] == gauge, 'date_time'].min() - pd.Timedelta('30D')
+    assert np.isnan(index.window_total('no such gauge', before, before + pd.Timedelta('1D')))
+    assert np.isnan(index.window_total(gauge, before, before + pd.Timedelta('1D')))
+    assert index.window_total(gauge, before, before + pd.Timedelta('1D'), covered=False) == 0
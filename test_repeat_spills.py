@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""
+Tests of repeat_spills.py: the prior counts per key and within
+a radius agree with comparing every pair of spills.
+
+    python -m pytest test_repeat_spills.py
+"""
+
+
+import numpy as np
+import pandas as pd
+
+import repeat_spills
+import spatial
+
+
+WINDOW = pd.Timedelta('730D')
+
+
+def random_spills(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = 29.42 + rng.normal(0, 0.002, n)
+    lon = -98.49 + rng.normal(0, 0.002, n)
+    lat[rng.random(n) < 0.05] = np.nan
+    units = pd.Series(rng.choice(['A1', 'A2', 'A3', 'B7', 'na', None], n), dtype=object)
+    return pd.DataFrame({'report_date': pd.Timestamp('2012-01-01')
+                                        + pd.to_timedelta(rng.integers(0, 6 * 365, n), unit='D'),
+                         'unit_id_1': units,
+                         'canonical_address': pd.Categorical(rng.choice(['1 MAIN ST', '2 MAIN ST', 'nan'], n)),
+                         'lat': lat, 'long': lon})
+
+
+def earlier(times, t):
+    return (times < t) & (times >= t - WINDOW)
+
+
+def haversine_m(lat, lon, lat0, lon0):
+    lat, lon, lat0, lon0 = map(np.radians, (lat, lon, lat0, lon0))
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * spatial.EARTH_RADIUS_KM * 1000 * np.arcsin(np.sqrt(a))
+
+
+def test_prior_counts_match_every_pair():
+    spills = random_spills(400)
+    counted = repeat_spills.repeat_spills(spills, window='730D', radius=100)
+    times = spills['report_date']
+    for key in ['unit_id_1', 'canonical_address']:
+        values = spills[key].astype(object)
+        missing = values.isna() | values.isin(repeat_spills.MISSING_KEYS)
+        expected = [-1 if missing[i] else int(((values == values[i]) & earlier(times, times[i])).sum())
+                    for i in range(len(spills))]
+        assert counted['prior_' + key].tolist() == expected
+
+
+def test_nearby_counts_match_every_pair():
+    spills = random_spills(400)
+    counted = repeat_spills.repeat_spills(spills, window='730D', radius=100)
+    times = spills['report_date']
+    expected = []
+    for i in range(len(spills)):
+        if np.isnan(spills['lat'][i]):
+            expected.append(-1)
+            continue
+        metres = haversine_m(spills['lat'], spills['long'], spills['lat'][i], spills['long'][i])
+        expected.append(int(((metres <= 100) & earlier(times, times[i])).sum()))
+    assert counted['prior_100m'].tolist() == expected
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+"""
+Tests of sso_store.py: a store built over several refreshes
+holds the same cleaned spills as a full clean of the snapshot.
+
+    python -m pytest test_sso_store.py
+"""
+
+
+import pandas as pd
+import pytest
+
+import acquire_sso
+import prepare_sso
+import sso_store
+
+
+@pytest.fixture(scope='module')
+def raw():
+    return acquire_sso.read_data('saws-sso.csv')
+
+
+def stored(store):
+    return store.read().sort_values(sso_store.CLEAN_KEY, ignore_index=True)
+
+
+def full_clean(raw):
+    cleaned = prepare_sso.prepare(raw.copy(), use_cache=False)
+    cleaned.insert(0, 'inspection_key', raw['INSPKEY'].astype('Int64').to_numpy())
+    cleaned.insert(0, 'sso_id', raw['SSO_ID'].to_numpy())
+    return cleaned.sort_values(sso_store.CLEAN_KEY, ignore_index=True)
+
+
+def test_incremental_build_equals_full_rebuild(raw, tmp_path):
+    incremental = sso_store.SSOStore(str(tmp_path / 'incremental'))
+    for cut in raw['REPORTDATE'].quantile([0.5, 0.9]):
+        incremental.update(raw[raw['REPORTDATE'] < cut].copy())
+    incremental.update(raw.copy())
+
+    rebuilt = sso_store.SSOStore(str(tmp_path / 'rebuilt'))
+    rebuilt.update(raw.copy())
+
+    pd.testing.assert_frame_equal(stored(incremental), stored(rebuilt))
+
+
+def test_address_keys_match_a_full_clean(raw, tmp_path):
+    store = sso_store.SSOStore(str(tmp_path))
+    store.update(raw[raw['REPORTDATE'] < raw['REPORTDATE'].quantile(0.9)].copy())
+    store.update(raw.copy())
+
+    expected = full_clean(raw)['canonical_address'].astype(object)
+    got = stored(store)['canonical_address'].astype(object)
+    assert got.fillna('').tolist() == expected.fillna('').tolist()
+    assert got.str.startswith('307 AZUCENA').sum() == (got == '307 AZUCENA ST').sum()
+
+
+def test_refresh_without_changes_is_a_no_op(raw, tmp_path):
+    store = sso_store.SSOStore(str(tmp_path))
+    store.update(raw.copy())
+    summary = sso_store.SSOStore(str(tmp_path)).update(raw.copy())
+    assert (summary['new'], summary['changed'], summary['partitions']) == (0, 0, [])
+
+
+def test_spills_without_a_date_are_read_back(raw, tmp_path):
+    undated = raw.head(20).copy()
+    undated.loc[undated.index[:5], 'REPORTDATE'] = pd.NaT
+    store = sso_store.SSOStore(str(tmp_path))
+    summary = store.update(undated)
+    assert sso_store.UNKNOWN in summary['partitions']
+    assert len(store.read()) == 20
+    assert store.read()['report_date'].isna().sum() == 5
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+"""
+Tests of windows.py: the strided windows hold the samples of
+the split_sequence loop of the notebook.
+
+    python -m pytest test_windows.py
+"""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import windows
+
+
+def split_sequence_loop(sequence, n_steps, horizon=1):
+    X, y = [], []
+    for i in range(len(sequence) - n_steps - horizon + 1):
+        X.append(sequence[i:i + n_steps])
+        y.append(sequence[i + n_steps] if horizon == 1 else sequence[i + n_steps:i + n_steps + horizon])
+    return np.array(X), np.array(y)
+
+
+@pytest.mark.parametrize('horizon', [1, 3])
+def test_windows_match_the_notebook_loop(horizon):
+    sequence = np.arange(20.0) ** 2
+    X, y = windows.split_sequence(sequence, 4, horizon=horizon)
+    expected_X, expected_y = split_sequence_loop(sequence, 4, horizon=horizon)
+    assert np.array_equal(X, expected_X) and np.array_equal(y, expected_y)
+
+
+@pytest.mark.parametrize('values, horizon, x_shape, y_shape', [
+    (np.arange(4.0), 1, (0, 4), (0,)),
+    (np.arange(5.0), 2, (0, 4), (0, 2)),
+    (np.zeros((3, 2)), 1, (0, 4, 2), (0, 2)),
+    (np.zeros((3, 2)), 2, (0, 4, 2), (0, 2, 2)),
+])
+def test_short_sequences_give_empty_windows(values, horizon, x_shape, y_shape):
+    X, y = windows.sliding_windows(values, 4, horizon=horizon)
+    assert X.shape == x_shape and y.shape == y_shape
+
+
+def test_grouped_windows_do_not_cross_groups():
+    frame = pd.DataFrame({'site': ['a'] * 6 + ['b'] * 3 + ['c'] * 7, 'value': np.arange(16.0)})
+    X, y, starts = windows.grouped_windows(frame, 'site', ['value'], n_steps=3)
+    assert starts.tolist() == [0, 1, 2, 9, 10, 11, 12]
+    assert np.array_equal(X[starts][:, -1] + 1, y[starts])
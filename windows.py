@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+"""
+This script contains code used by the following jupytr notebooks:
+
+1. dd-aqi-36.ipynb
+2.
+3.
+
+It builds the (samples, time steps, features) training windows
+for the forecasting models as strided views of one array, so
+no window is copied until a batch of them is handed to a model:
+
+    X, y, starts = windows.grouped_windows(aqi, 'site', ['pm25'], n_steps=24)
+    for X_batch, y_batch in windows.batches(X, y, starts, batch_size=256):
+        model.train_on_batch(X_batch, y_batch)
+"""
+
+
+
+# ===========
+# ENVIRONMENT
+# ===========
+
+
+import os
+import sys
+
+import pandas as pd
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+
+# =======
+# WINDOWS
+# =======
+
+
+def sliding_windows(values, n_steps, horizon=1, stride=1, target=None):
+    """
+    This function returns the input windows X and the targets y
+    of a sequence as read-only views of it. values is a 1-d
+    sequence or a (time steps, features) array; X has the shape
+    (samples, n_steps) or (samples, n_steps, features) and y
+    holds the next horizon values of the target feature(s)
+    (all of them by default), without the horizon axis when
+    horizon is 1. stride keeps every stride-th window. A
+    sequence shorter than n_steps + horizon gives no samples:
+    X is (0, n_steps[, features]) and y is (0[, horizon][,
+    features]), where the notebook loop returned (0,) arrays.
+    """
+    values = np.asarray(values)
+    targets = values if target is None or values.ndim == 1 else values[:, target]
+    if len(values) < n_steps + horizon:
+        y_shape = (0,) + ((horizon,) if horizon != 1 else ()) + targets.shape[1:]
+        return (np.empty((0, n_steps) + values.shape[1:], dtype=values.dtype),
+                np.empty(y_shape, dtype=targets.dtype))
+    x = sliding_window_view(values, n_steps, axis=0)
+    y = sliding_window_view(targets[n_steps:], horizon, axis=0)
+    x = x[:len(y)]
+    if values.ndim > 1:
+        x = np.moveaxis(x, -1, 1)
+    if targets.ndim > 1:
+        y = np.moveaxis(y, -1, 1)
+    if horizon == 1:
+        y = y[:, 0]
+    return x[::stride], y[::stride]
+
+
+def split_sequence(sequence, n_steps, horizon=1, stride=1):
+    """
+    This function splits a sequence into samples like the
+    split_sequence loop of the notebook, but returns views.
+    """
+    return sliding_windows(sequence, n_steps, horizon=horizon, stride=stride)
+
+
+def window_starts(groups, n_steps, horizon=1, stride=1):
+    """
+    This function returns the positions of the windows that
+    start and end (target included) in the same run of a
+    sorted group label array, keeping every stride-th window
+    of each group.
+    """
+    codes, _ = pd.factorize(np.asarray(groups))
+    length = n_steps + horizon
+    count = len(codes) - length + 1
+    if count <= 0:
+        return np.zeros(0, dtype='int64')
+    new_group = np.concatenate([[True], codes[1:] != codes[:-1]])
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(len(codes)), 0))
+    starts = np.arange(count)
+    inside = group_start[starts + length - 1] == group_start[starts]
+    aligned = (starts - group_start[starts]) % stride == 0
+    return starts[inside & aligned]
+
+
+def grouped_windows(frame, by, columns, n_steps, horizon=1, stride=1, target=None, sort=None,
+                    dtype='float32'):
+    """
+    This function returns the windows of every group of frame
+    (e.g. per monitor or per gauge) without windows crossing
+    from one group into the next. The rows are sorted by the
+    group and the sort column(s), the columns are copied once
+    into a single array, and the windows of all groups are
+    returned as views X and y of it together with the starts
+    of the valid windows: X[starts] and y[starts] are the
+    samples. target is a position in columns.
+    """
+    order = [by] + ([] if sort is None else list(np.atleast_1d(sort)))
+    frame = frame.sort_values(order, kind='stable')
+    columns = list(np.atleast_1d(columns))
+    values = frame[columns].to_numpy(dtype=dtype)
+    if len(columns) == 1:
+        values = values[:, 0]
+        target = None
+    x, y = sliding_windows(values, n_steps, horizon=horizon, target=target)
+    return x, y, window_starts(frame[by].to_numpy(), n_steps, horizon=horizon, stride=stride)
+
+
+def batches(x, y, starts=None, batch_size=256, shuffle=False, random_state=None):
+    """
+    This function yields (X, y) batches of the samples at the
+    starts positions (all samples by default). Only the
+    windows of one batch are copied at a time.
+    """
+    if starts is None:
+        starts = np.arange(len(x))
+    if shuffle:
+        starts = np.random.default_rng(random_state).permutation(starts)
+    for i in range(0, len(starts), batch_size):
+        chunk = starts[i:i + batch_size]
+        yield x[chunk], y[chunk]
+
+
+
+# ==================================================
+# MAIN
+# ==================================================
+
+
+def clear():
+    os.system("cls" if os.name == "nt" else "clear")
+
+def main():
+    """Main entry point for the script."""
+    pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+
+
+
+
+
+
+
+
+
+__authors__ = ["Joseph Burton", "Ednalyn C. De Dios", "Sandy Graham"]
+__copyright__ = "Copyright 2019, Codeup Data Science"
+__license__ = "MIT"
+__version__ = "1.0.0"
+__maintainers__ = "Ednalyn C. De Dios"
+__email__ = "ednalyn.dedios@gmail.com"
+__status__ = "Prototype"